@@ -16,7 +16,7 @@ class VoosClient:
     
     def consultar_voos(self, origem=None, destino=None, data=None, 
                       preco_max=0, companhia_aerea=None, faixa_horario=None, 
-                      ordenacao="preco"):
+                      ordenacao="preco", page_size=0, page_token=None):
         request = voos_service_pb2.ConsultaVoosRequest(
             origem=origem or "",
             destino=destino or "",
@@ -24,7 +24,9 @@ class VoosClient:
             preco_max=preco_max,
             companhia_aerea=companhia_aerea or "",
             faixa_horario=faixa_horario or "",
-            ordenacao=ordenacao
+            ordenacao=ordenacao,
+            page_size=page_size,
+            page_token=page_token or ""
         )
         
         try:
@@ -0,0 +1,13 @@
+import sys
+import os
+
+# Adicionar o diretório raiz ao path
+root_path = os.path.join(os.path.dirname(__file__), '../..')
+sys.path.insert(0, root_path)
+
+if __name__ == '__main__':
+    # Os endereços dos serviços de voos e de hotéis vêm de
+    # VOOS_SERVICE_ENDERECO e HOTEIS_SERVICE_ENDERECO
+    from pacotes_server import serve
+
+    serve()
@@ -1,12 +1,47 @@
 import sys
 import os
+import argparse
+import tempfile
+import glob
 
 # Adicionar o diretório raiz ao path
 root_path = os.path.join(os.path.dirname(__file__), '../..')
 sys.path.insert(0, root_path)
 
-# Importar e executar o servidor principal que já tem Prometheus configurado
-from voos_server import serve
+def preparar_metricas_multiprocesso():
+    # O prometheus_client decide o modo multiprocesso na importação, então o
+    # diretório precisa existir (e estar limpo) antes de importar o servidor
+    diretorio = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if not diretorio:
+        diretorio = tempfile.mkdtemp(prefix='voos-metricas-')
+        os.environ['PROMETHEUS_MULTIPROC_DIR'] = diretorio
+    os.makedirs(diretorio, exist_ok=True)
+    for arquivo in glob.glob(os.path.join(diretorio, '*.db')):
+        os.remove(arquivo)
 
 if __name__ == '__main__':
-    serve()
+    parser = argparse.ArgumentParser(description="Servidor gRPC de Voos")
+    parser.add_argument(
+        '--modo',
+        choices=['thread', 'aio'],
+        default=os.environ.get('VOOS_SERVER_MODO', 'thread'),
+        help="thread: grpc.server com ThreadPoolExecutor; aio: grpc.aio (asyncio)"
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=int(os.environ.get('VOOS_WORKERS', '1')),
+        help="processos worker escutando na porta 50051 com SO_REUSEPORT"
+    )
+    args = parser.parse_args()
+
+    if args.workers > 1:
+        preparar_metricas_multiprocesso()
+
+    # Importar e executar o servidor escolhido (ambos já têm Prometheus configurado)
+    if args.modo == 'aio':
+        from voos_server_aio import serve
+    else:
+        from voos_server import serve
+
+    serve(workers=args.workers)
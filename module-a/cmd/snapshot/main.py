@@ -0,0 +1,29 @@
+import sys
+import os
+import argparse
+
+# Adicionar o diretório raiz ao path
+root_path = os.path.join(os.path.dirname(__file__), '../..')
+sys.path.insert(0, root_path)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Gera o snapshot binário do inventário de voos")
+    parser.add_argument(
+        'caminho',
+        nargs='?',
+        default=os.environ.get('VOOS_SNAPSHOT'),
+        help="arquivo de saída (padrão: VOOS_SNAPSHOT)"
+    )
+    args = parser.parse_args()
+    if not args.caminho:
+        parser.error("informe o caminho do snapshot ou defina VOOS_SNAPSHOT")
+
+    # Gera com as mesmas variáveis do servidor (VOOS_TOTAL_VOOS, VOOS_SEMENTE,
+    # VOOS_DATA_ANCORA), então o servidor carrega exatamente estes voos
+    from voos_server import VoosServiceImpl
+    from internal.inventario import InventarioVoos
+    from internal.snapshot import salvar_snapshot
+
+    inventario = InventarioVoos(*VoosServiceImpl._gerar_base_voos())
+    salvar_snapshot(inventario, args.caminho, VoosServiceImpl._parametros_geracao())
+    print(f"💾 Snapshot gravado em {args.caminho} ({os.path.getsize(args.caminho)} bytes)")
@@ -0,0 +1,49 @@
+import json
+
+import numpy as np
+
+# Layout comum ao segmento de memória compartilhada e ao snapshot: depois de
+# um cabeçalho próprio de cada um vem um JSON de metadados e, em seguida,
+# arrays NumPy em sequência, cada bloco alinhado em ALINHAMENTO bytes
+ALINHAMENTO = 64
+
+
+def alinhar(valor):
+    return (valor + ALINHAMENTO - 1) // ALINHAMENTO * ALINHAMENTO
+
+
+def dispor_blocos(offset_meta, tamanhos, montar_meta):
+    # Offsets dos blocos com `tamanhos` bytes, nessa ordem, depois do JSON
+    # de metadados que começa em `offset_meta`. Os offsets dependem do
+    # tamanho do JSON, que depende dos offsets: montar_meta(offsets) monta
+    # os metadados e o início dos dados avança até o JSON caber antes dele.
+    # Devolve (JSON dos metadados, offsets, tamanho total).
+    relativos = []
+    tamanho_dados = 0
+    for tamanho in tamanhos:
+        relativos.append(tamanho_dados)
+        tamanho_dados = alinhar(tamanho_dados + tamanho)
+
+    inicio_dados = alinhar(offset_meta)
+    while True:
+        offsets = [inicio_dados + relativo for relativo in relativos]
+        meta_json = json.dumps(montar_meta(offsets)).encode()
+        if offset_meta + len(meta_json) <= inicio_dados:
+            return meta_json, offsets, inicio_dados + tamanho_dados
+        inicio_dados = alinhar(offset_meta + len(meta_json))
+
+
+def gravar_blocos(buf, blocos, offsets):
+    # Copia cada array para o seu offset em `buf` (um buffer gravável do
+    # tamanho devolvido por dispor_blocos)
+    for valores, offset in zip(blocos, offsets):
+        if valores.size:
+            destino = np.frombuffer(buf, dtype=valores.dtype, count=valores.size, offset=offset)
+            destino[:] = valores.reshape(-1)
+            del destino
+
+
+def ler_bloco(buf, tipo, forma, offset):
+    # Array sobre `buf` a partir de `offset`, sem copiar
+    forma = tuple(forma) if isinstance(forma, (list, tuple)) else (forma,)
+    return np.frombuffer(buf, dtype=np.dtype(tipo), count=int(np.prod(forma)), offset=offset).reshape(forma)
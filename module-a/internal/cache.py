@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+
+from internal.dicionarios import normalizar
+from internal.inventario import ORDENACOES
+
+
+def chave_consulta(request):
+    # Forma canônica da consulta: cidades e companhia sem diferença de
+    # acentos/caixa/espaços (como o inventário as resolve) e ordenação padrão
+    # explícita, para que consultas equivalentes caiam na mesma entrada
+    ordenacao = request.ordenacao if request.ordenacao in ORDENACOES else ORDENACOES[0]
+    return (
+        normalizar(request.origem),
+        normalizar(request.destino),
+        request.data,
+        request.data_inicio,
+        request.data_fim,
+        request.preco_max if request.preco_max > 0 else 0.0,
+        normalizar(request.companhia_aerea),
+        request.faixa_horario,
+        ordenacao,
+        max(request.page_size, 0),
+        request.page_token,
+        request.incluir_facetas,
+        request.largura_faixa_preco if request.incluir_facetas and request.largura_faixa_preco > 0 else 0.0,
+        tuple(sorted(set(request.campos.paths))),
+    )
+
+
+class CacheConsultas:
+    # Cache LRU limitado por quantidade de entradas e com TTL. Cada entrada
+    # guarda a versão do inventário em que foi calculada; qualquer mudança
+    # no inventário torna as entradas antigas inválidas.
+
+    def __init__(self, max_itens=1024, ttl_segundos=30.0):
+        self.max_itens = max_itens
+        self.ttl_segundos = ttl_segundos
+        self._entradas = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obter(self, chave, versao):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None:
+                return None
+
+            valor, versao_entrada, expira_em = entrada
+            if versao_entrada != versao or expira_em < time.monotonic():
+                del self._entradas[chave]
+                return None
+
+            self._entradas.move_to_end(chave)
+            return valor
+
+    def guardar(self, chave, versao, valor):
+        # Devolve quantas entradas foram removidas por falta de espaço
+        if self.max_itens <= 0:
+            return 0
+
+        removidas = 0
+        with self._lock:
+            self._entradas[chave] = (valor, versao, time.monotonic() + self.ttl_segundos)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.max_itens:
+                self._entradas.popitem(last=False)
+                removidas += 1
+        return removidas
+
+    def limpar(self):
+        with self._lock:
+            self._entradas.clear()
@@ -0,0 +1,64 @@
+import sys
+import unicodedata
+
+# Apelidos aceitos nas consultas além do próprio nome: códigos IATA dos
+# aeroportos (e da cidade, quando há mais de um aeroporto) e grafias comuns
+ALIASES_CIDADES = {
+    "São Paulo": ["SAO", "GRU", "CGH", "VCP", "Sampa"],
+    "Rio de Janeiro": ["RIO", "GIG", "SDU"],
+    "Brasília": ["BSB"],
+    "Belo Horizonte": ["BHZ", "CNF", "PLU", "BH"],
+    "Salvador": ["SSA"],
+    "Recife": ["REC"],
+    "Fortaleza": ["FOR"],
+    "Manaus": ["MAO"],
+    "Porto Alegre": ["POA"],
+}
+
+# Códigos IATA das companhias
+ALIASES_COMPANHIAS = {
+    "LATAM": ["LA"],
+    "GOL": ["G3"],
+    "Azul": ["AD"],
+    "TAM": ["JJ"],
+    "Avianca": ["O6"],
+}
+
+
+def normalizar(texto):
+    # Forma de comparação: sem acentos, sem diferença de caixa e com os
+    # espaços colapsados ("  São  PAULO " -> "sao paulo")
+    decomposto = unicodedata.normalize("NFKD", texto)
+    sem_acentos = "".join(c for c in decomposto if not unicodedata.combining(c))
+    return " ".join(sem_acentos.casefold().split())
+
+
+class DicionarioCodigos:
+    # Codificação por dicionário: cada valor recebe como código sua posição
+    # em `valores`. Nomes e apelidos são normalizados uma única vez aqui,
+    # então uma consulta custa uma normalização e uma busca no dict, e daí
+    # em diante é comparada como inteiro.
+
+    def __init__(self, valores, aliases=None):
+        self.valores = [sys.intern(valor) for valor in valores]
+        self._codigos = {}
+        for codigo, valor in enumerate(self.valores):
+            self._codigos.setdefault(normalizar(valor), codigo)
+        for valor, apelidos in (aliases or {}).items():
+            codigo = self._codigos.get(normalizar(valor))
+            if codigo is None:
+                continue
+            for apelido in apelidos:
+                self._codigos.setdefault(normalizar(apelido), codigo)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def codigo(self, texto):
+        # Código do valor, ou None se nem o nome nem um apelido casarem
+        return self._codigos.get(normalizar(texto))
+
+    def nome(self, texto):
+        # Nome canônico do valor, ou None
+        codigo = self.codigo(texto)
+        return None if codigo is None else self.valores[codigo]
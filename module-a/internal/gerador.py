@@ -0,0 +1,89 @@
+from datetime import date
+
+import numpy as np
+
+from internal.inventario import STATUS_VOO
+
+CIDADES = ["São Paulo", "Rio de Janeiro", "Brasília", "Belo Horizonte",
+           "Salvador", "Recife", "Fortaleza", "Manaus", "Porto Alegre"]
+COMPANHIAS = ["LATAM", "GOL", "Azul", "TAM", "Avianca"]
+AERONAVES = ["Boeing 737", "Airbus A320", "Embraer E190", "Boeing 777"]
+CLASSES = ["Econômica", "Executiva", "Primeira Classe"]
+MULTIPLICADOR_CLASSE = np.array([1.0, 2.5, 4.0])
+PREFIXOS_VOO = ["LA", "G3", "AD", "JJ"]
+
+# Os primeiros dias têm poucos voos, todos ativos e com assentos; o resto
+# do inventário se espalha entre os dias DIAS_INICIAIS + 1 e DIAS_TOTAL
+DIAS_INICIAIS = 10
+DIAS_TOTAL = 60
+
+# Probabilidade de cada status de STATUS_VOO fora dos dias iniciais
+PROBABILIDADE_STATUS = [0.6, 0.2, 0.2]
+
+SEMENTE_PADRAO = 42
+
+
+def gerar_inventario(total_voos=1000, semente=SEMENTE_PADRAO, data_ancora=None):
+    # Gera o inventário inteiro de uma vez, coluna a coluna, com um gerador
+    # NumPy semeado: a mesma semente e a mesma data âncora produzem
+    # exatamente os mesmos voos em qualquer réplica. Devolve
+    # (colunas, dicionarios, data_base) no formato de InventarioVoos.
+    rng = np.random.default_rng(semente)
+    data_ancora = data_ancora or date.today()
+
+    por_dia = rng.integers(3, 6, size=DIAS_INICIAIS)
+    dias_iniciais = np.repeat(np.arange(DIAS_INICIAIS, dtype=np.int32), por_dia)[:total_voos]
+    n_iniciais = len(dias_iniciais)
+    n_restantes = total_voos - n_iniciais
+
+    dia = np.concatenate((
+        dias_iniciais,
+        rng.integers(DIAS_INICIAIS + 1, DIAS_TOTAL + 1, size=n_restantes, dtype=np.int32),
+    ))
+
+    # Destino sorteado entre as demais cidades: deslocamento de 1 a n-1
+    n_cidades = len(CIDADES)
+    origem = rng.integers(0, n_cidades, size=total_voos, dtype=np.int16)
+    destino = (origem + rng.integers(1, n_cidades, size=total_voos, dtype=np.int16)) % n_cidades
+
+    partida = rng.integers(6, 23, size=total_voos, dtype=np.int16) * 60 + \
+        rng.integers(0, 4, size=total_voos, dtype=np.int16) * 15
+    duracao = rng.integers(60, 481, size=total_voos, dtype=np.int32)
+
+    classe = rng.integers(0, len(CLASSES), size=total_voos, dtype=np.int8)
+    preco = np.round(rng.uniform(150.0, 800.0, size=total_voos) * MULTIPLICADOR_CLASSE[classe], 2)
+
+    assentos = np.concatenate((
+        rng.integers(5, 181, size=n_iniciais, dtype=np.int32),
+        rng.integers(0, 181, size=n_restantes, dtype=np.int32),
+    ))
+    status = np.concatenate((
+        np.zeros(n_iniciais, dtype=np.int8),
+        rng.choice(len(STATUS_VOO), size=n_restantes, p=PROBABILIDADE_STATUS).astype(np.int8),
+    ))
+
+    colunas = {
+        "origem": origem,
+        "destino": destino.astype(np.int16),
+        "dia": dia,
+        "partida_minutos": partida.astype(np.int16),
+        "duracao_minutos": duracao,
+        "preco": preco,
+        "companhia": rng.integers(0, len(COMPANHIAS), size=total_voos, dtype=np.int8),
+        "prefixo_voo": rng.integers(0, len(PREFIXOS_VOO), size=total_voos, dtype=np.int8),
+        "numero_voo": rng.integers(1000, 10000, size=total_voos, dtype=np.int16),
+        "assentos_disponiveis": assentos,
+        "status_voo": status,
+        "classe": classe,
+        "aeronave": rng.integers(0, len(AERONAVES), size=total_voos, dtype=np.int8),
+        "versao_linha": np.zeros(total_voos, dtype=np.uint32),
+    }
+    dicionarios = {
+        "cidades": list(CIDADES),
+        "companhias": list(COMPANHIAS),
+        "status": list(STATUS_VOO),
+        "classes": list(CLASSES),
+        "aeronaves": list(AERONAVES),
+        "prefixos_voo": list(PREFIXOS_VOO),
+    }
+    return colunas, dicionarios, data_ancora
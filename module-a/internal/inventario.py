@@ -0,0 +1,962 @@
+import itertools
+import math
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+
+import numpy as np
+
+import voos_service_pb2
+from internal.dicionarios import ALIASES_CIDADES, ALIASES_COMPANHIAS, DicionarioCodigos
+
+# Faixas de horário de partida em minutos desde a meia-noite: [inicio, fim)
+FAIXAS_HORARIO = {
+    "manha": (6 * 60, 12 * 60),
+    "tarde": (12 * 60, 18 * 60),
+    "noite": (18 * 60, 24 * 60),
+}
+
+# Código de cada faixa na coluna derivada faixa_partida (-1: fora das faixas)
+FAIXAS = tuple(FAIXAS_HORARIO)
+
+HORARIOS = [f"{m // 60:02d}:{m % 60:02d}" for m in range(24 * 60)]
+
+# Datas e horários dos voos estão no horário de Brasília; os timestamps
+# (segundos desde a época Unix) são calculados nesse fuso
+FUSO_VOOS = timezone(timedelta(hours=-3))
+
+STATUS_ATIVO = "ativo"
+STATUS_VOO = (STATUS_ATIVO, "cancelado", "lotado")
+
+# Número de faixas de preço nas facetas de uma consulta
+FAIXAS_PRECO_MAX = 40
+
+# Campos de Voo na ordem dos números de campo (a ordem da serialização)
+CAMPOS_VOO = tuple(campo.name for campo in voos_service_pb2.Voo.DESCRIPTOR.fields)
+
+# Máscaras de campos com bytes em cache ao mesmo tempo; a usada há mais
+# tempo sai quando uma nova chega
+MASCARAS_EM_CACHE = 8
+
+# Voos com bytes em cache por máscara de campos; passando disso sai o voo
+# que entrou primeiro
+VOOS_POR_MASCARA = 20_000
+
+# Critérios de ordenação suportados; o primeiro é o padrão
+ORDENACOES = ("preco", "horario", "duracao")
+
+# Uma partição do índice é compactada quando lápides e entradas novas
+# passam de 1/FRACAO_COMPACTACAO dela, ou as novas passam da raiz do seu
+# tamanho (nos dois casos, nunca abaixo de COMPACTACAO_MINIMA)
+FRACAO_COMPACTACAO = 8
+COMPACTACAO_MINIMA = 32
+
+# Fatias dos contadores de versão e do log de alterações: a escrita na
+# linha i só toca a fatia i % FATIAS_VERSAO, e quem serializa as escritas
+# de uma fatia (as listras de ReservasAssentos) dispensa uma trava global
+FATIAS_VERSAO = 64
+
+# Linhas alteradas guardadas por fatia no log compartilhado para cada
+# processo reindexar; quem ficar mais atrasado que isso compara versao_linha
+TAMANHO_LOG = 1024
+
+# Tag do campo 1 com wire type 2 (length-delimited): é o campo `voos` em
+# ConsultaVoosResponse e em LoteVoos, `respostas` em ConsultaVoosLoteResponse
+# e `dias` em CalendarioPrecosResponse
+TAG_CAMPO_VOOS = b"\x0a"
+
+
+class MascaraCamposInvalida(ValueError):
+    pass
+
+
+def _varint(valor):
+    saida = bytearray()
+    while valor > 0x7F:
+        saida.append((valor & 0x7F) | 0x80)
+        valor >>= 7
+    saida.append(valor)
+    return bytes(saida)
+
+
+def enquadrar(corpo):
+    # Mensagem serializada como um elemento do campo 1 (tag + tamanho + bytes)
+    return TAG_CAMPO_VOOS + _varint(len(corpo)) + corpo
+
+
+class _VoosProjetados(dict):
+    # Bytes em cache de uma máscara de campos por linha, com o mesmo acesso
+    # da lista de voos inteiros (None quando a linha não está), mas só com
+    # os voos já pedidos e no máximo VOOS_POR_MASCARA deles
+    __slots__ = ()
+
+    def __missing__(self, linha):
+        return None
+
+    def __setitem__(self, linha, entrada):
+        if len(self) >= VOOS_POR_MASCARA and linha not in self:
+            self.pop(next(iter(self)), None)
+        super().__setitem__(linha, entrada)
+
+
+def _intercalar(a, b):
+    # Intercala dois trechos (linhas, chaves), cada um em ordem de (chave,
+    # linha) e sem linhas em comum, numa única sequência nessa ordem. A
+    # posição de cada entrada de `b` em `a` sai de uma busca binária pela
+    # chave; só as que empatam na chave com `a` precisam da linha, e essas
+    # são resolvidas juntas numerando os grupos de chaves iguais de `a`:
+    # (grupo, linha) vira um inteiro já ordenado.
+    (linhas_a, chaves_a), (linhas_b, chaves_b) = a, b
+    posicoes = chaves_a.searchsorted(chaves_b, side="left")
+    empates = np.flatnonzero(chaves_a.searchsorted(chaves_b, side="right") != posicoes)
+    if len(empates):
+        grupos = np.r_[0, np.cumsum(chaves_a[1:] != chaves_a[:-1])].astype(np.int64)
+        compostas = (grupos << 32) | linhas_a
+        posicoes[empates] = compostas.searchsorted((grupos[posicoes[empates]] << 32) | linhas_b[empates])
+    return np.insert(linhas_a, posicoes, linhas_b), np.insert(chaves_a, posicoes, chaves_b)
+
+
+class Particao:
+    # Linhas de uma partição do índice em ordem de (chave, linha), junto com
+    # as chaves de ordenação, para achar a posição de uma linha por busca
+    # binária. É imutável: quem altera o índice publica uma Particao nova no
+    # lugar da antiga (uma atribuição no dicionário), então um leitor sempre
+    # vê linhas e chaves do mesmo momento.
+    #
+    # Uma entrada que deixa de valer (o voo saiu do índice ou, na ordenação
+    # por preço, mudou de preço) fica nos arrays como lápide, contada em
+    # `mortas`, e os leitores a descartam (InventarioVoos._validas). Só uma
+    # chave que a linha ainda não tem na partição precisa de entrada nova:
+    # ela vai para `novas`, um trecho pequeno e ordenado intercalado com o
+    # principal na primeira leitura de `linhas`. O inventário compacta a
+    # partição quando lápides e novas passam de uma fração dela.
+    __slots__ = ("_principal", "novas", "mortas", "_intercalada")
+
+    def __init__(self, linhas, chaves, mortas=0, novas=None):
+        self._principal = (linhas, chaves)
+        self.novas = novas
+        self.mortas = mortas
+        self._intercalada = self._principal if novas is None else None
+
+    @classmethod
+    def vazia(cls, tipo_chave):
+        return cls(np.empty(0, dtype=np.int32), np.empty(0, dtype=tipo_chave))
+
+    def __len__(self):
+        return len(self._principal[0]) + (len(self.novas[0]) if self.novas is not None else 0)
+
+    def _arrays(self):
+        # Principal e novas intercalados, calculado uma vez por Particao
+        intercalada = self._intercalada
+        if intercalada is None:
+            intercalada = self._intercalada = _intercalar(self._principal, self.novas)
+        return intercalada
+
+    def trechos(self):
+        # Principal e novas, cada um em ordem (chave, linha), sem intercalar
+        return (self._principal,) if self.novas is None else (self._principal, self.novas)
+
+    @property
+    def linhas(self):
+        return self._arrays()[0]
+
+    @property
+    def chaves(self):
+        return self._arrays()[1]
+
+    @classmethod
+    def intercalar(cls, particoes):
+        # Une partições sem linhas em comum (as de dias diferentes) na ordem
+        # (chave, linha), intercalando as sequências já ordenadas de duas em
+        # duas: O(n log k) para k partições, sem reordenar do zero
+        trechos = [(p.linhas, p.chaves) for p in particoes]
+        while len(trechos) > 1:
+            trechos = [_intercalar(*trechos[i:i + 2]) if i + 1 < len(trechos) else trechos[i]
+                       for i in range(0, len(trechos), 2)]
+        return cls(*trechos[0])
+
+    def quantidade_ate(self, chave_max):
+        # Quantas linhas têm chave <= chave_max: elas formam um prefixo
+        return int(np.searchsorted(self.chaves, chave_max, side="right"))
+
+    def intervalo(self, inicio, fim):
+        # Posições [a, b) das linhas com inicio <= chave < fim
+        return (int(np.searchsorted(self.chaves, inicio, side="left")),
+                int(np.searchsorted(self.chaves, fim, side="left")))
+
+    @staticmethod
+    def _posicao(linhas, chaves, chave, linha):
+        inicio = int(chaves.searchsorted(chave, side="left"))
+        fim = int(chaves.searchsorted(chave, side="right"))
+        return inicio + int(linhas[inicio:fim].searchsorted(linha))
+
+    @staticmethod
+    def _tem(linhas, chaves, chave, linha):
+        posicao = Particao._posicao(linhas, chaves, chave, linha)
+        return posicao < len(linhas) and linhas[posicao] == linha and chaves[posicao] == chave
+
+    def contem(self, chave, linha):
+        # Se a linha tem entrada (válida ou lápide) com essa chave, sem
+        # intercalar as novas
+        return self._tem(*self._principal, chave, linha) or \
+            (self.novas is not None and self._tem(*self.novas, chave, linha))
+
+    def com_mortas(self, mortas):
+        particao = Particao(*self._principal, mortas, self.novas)
+        particao._intercalada = self._intercalada
+        return particao
+
+    def com_nova(self, chave, linha, mortas):
+        if self.novas is None:
+            novas_linhas, novas_chaves = np.empty(0, dtype=np.int32), np.empty(0, dtype=self._principal[1].dtype)
+        else:
+            novas_linhas, novas_chaves = self.novas
+        posicao = self._posicao(novas_linhas, novas_chaves, chave, linha)
+        return Particao(*self._principal, mortas, (
+            np.concatenate((novas_linhas[:posicao], [linha], novas_linhas[posicao:])).astype(np.int32, copy=False),
+            np.concatenate((novas_chaves[:posicao], [chave], novas_chaves[posicao:])).astype(novas_chaves.dtype, copy=False),
+        ))
+
+    def precisa_compactar(self):
+        # Cada entrada nova copia as novas e cada compactação copia a
+        # partição: com as novas limitadas à raiz do tamanho, o custo
+        # amortizado de uma inserção fica em O(raiz de n)
+        tamanho = len(self)
+        novas = len(self.novas[0]) if self.novas is not None else 0
+        return self.mortas + novas > max(tamanho // FRACAO_COMPACTACAO, COMPACTACAO_MINIMA) or \
+            novas > max(math.isqrt(tamanho), COMPACTACAO_MINIMA)
+
+
+class InventarioVoos:
+    # Inventário em layout colunar (struct-of-arrays). Campos categóricos
+    # (cidades, companhias, status...) são guardados como códigos inteiros
+    # apontando para os dicionários abaixo; o id do voo é derivado da linha.
+    #
+    # As colunas podem ser arrays próprios ou views de um segmento de memória
+    # compartilhada (de_segmento). Nesse caso os contadores de versão também
+    # ficam no segmento, junto com o log das linhas alteradas, e cada
+    # processo percebe alterações feitas por outro: as linhas do log são
+    # reindexadas no índice local e os bytes em cache de cada voo são
+    # comparados com a coluna versao_linha.
+
+    def __init__(self, colunas, dicionarios, data_base, contadores=None, indice=None, alteracoes=None):
+        self.colunas = colunas
+        self.dicionarios = dicionarios
+        self.data_base = data_base
+        # Cidades e companhias resolvem nome, grafia sem acento ou código
+        # IATA para o mesmo código inteiro
+        self._codigos_cidade = DicionarioCodigos(dicionarios["cidades"], ALIASES_CIDADES)
+        self._codigos_companhia = DicionarioCodigos(dicionarios["companhias"], ALIASES_COMPANHIAS)
+        self.cidades = self._codigos_cidade.valores
+        self.companhias = self._codigos_companhia.valores
+        self.status = dicionarios["status"]
+        self.classes = dicionarios["classes"]
+        self.aeronaves = dicionarios["aeronaves"]
+        self.prefixos_voo = dicionarios["prefixos_voo"]
+
+        self.origem = colunas["origem"]
+        self.destino = colunas["destino"]
+        self.dia = colunas["dia"]
+        self.partida_minutos = colunas["partida_minutos"]
+        self.duracao_minutos = colunas["duracao_minutos"]
+        self.preco = colunas["preco"]
+        self.companhia = colunas["companhia"]
+        self.prefixo_voo = colunas["prefixo_voo"]
+        self.numero_voo = colunas["numero_voo"]
+        self.assentos_disponiveis = colunas["assentos_disponiveis"]
+        self.status_voo = colunas["status_voo"]
+        self.classe = colunas["classe"]
+        self.aeronave = colunas["aeronave"]
+        self.versao_linha = colunas["versao_linha"]
+        self._ultimo_dia = int(self.dia.max()) if len(self.dia) else 0
+
+        # Colunas derivadas (o horário de partida nunca muda): faixa de cada
+        # partida e o instante da partida como timestamp
+        self.faixa_partida = np.full(len(self.preco), -1, dtype=np.int8)
+        for codigo, (inicio, fim) in enumerate(FAIXAS_HORARIO.values()):
+            self.faixa_partida[(self.partida_minutos >= inicio) & (self.partida_minutos < fim)] = codigo
+        inicio_base = int(datetime.combine(data_base, time(), FUSO_VOOS).timestamp())
+        self.partida_timestamp = inicio_base + self.dia.astype(np.int64) * 86400 + \
+            self.partida_minutos.astype(np.int64) * 60
+
+        self._codigo_ativo = self.status.index(STATUS_ATIVO) if STATUS_ATIVO in self.status else -1
+        self._datas = {}
+
+        # Escritas por fatia: a versão do inventário (caches comparam com
+        # ela) é a soma. A linha da escrita v da fatia f fica em
+        # alteracoes[f, v % TAMANHO_LOG].
+        self._contadores = contadores if contadores is not None else np.zeros(FATIAS_VERSAO, dtype=np.uint64)
+        self._alteracoes = alteracoes if alteracoes is not None else \
+            np.zeros((FATIAS_VERSAO, TAMANHO_LOG), dtype=np.int32)
+        self._voos_serializados = [None] * len(self.preco)
+        # Bytes de voos projetados, um _VoosProjetados por máscara de campos
+        self._voos_projetados = {}
+        self._trava_projecoes = threading.Lock()
+        # Escritas já refletidas no índice, por fatia. Lidas antes de
+        # indexar: alterações feitas durante a construção são reaplicadas
+        # pelo log. Um índice pronto (de um snapshot) precisa ter sido
+        # construído com os contadores atuais.
+        self._aplicados = self._contadores.copy()
+        self._trava_indice = threading.Lock()
+        self._versao_linha_indexada = np.empty_like(self.versao_linha)
+        self._preco_indexado = np.empty_like(self.preco)
+        self._reservavel_indexado = np.empty(len(self.preco), dtype=bool)
+        self._marcar_indexado()
+        self.indice = indice if indice is not None else self._construir_indice()
+        self._construir_tarifas()
+
+    def __len__(self):
+        return len(self.preco)
+
+    @property
+    def versao(self):
+        return int(self._contadores.sum())
+
+    @classmethod
+    def de_segmento(cls, segmento, indice=None):
+        inventario = cls(segmento.colunas, segmento.dicionarios, segmento.data_base, segmento.contadores, indice,
+                         segmento.alteracoes)
+        # Mantém o mapeamento vivo enquanto o inventário existir
+        inventario._segmento = segmento
+        return inventario
+
+    def _chave_ordenacao(self, criterio_ordenacao):
+        if criterio_ordenacao == "horario":
+            return self.partida_minutos
+        elif criterio_ordenacao == "duracao":
+            return self.duracao_minutos
+        return self.preco
+
+    def _chave_indexada(self, criterio_ordenacao):
+        # Chaves como estão no índice deste processo (só o preço muda)
+        if criterio_ordenacao == "preco":
+            return self._preco_indexado
+        return self._chave_ordenacao(criterio_ordenacao)
+
+    def _reservaveis(self, linhas=slice(None)):
+        return (self.status_voo[linhas] == self._codigo_ativo) & (self.assentos_disponiveis[linhas] > 0)
+
+    def _construir_indice(self):
+        # Índice composto (origem, destino, dia) -> partição, com -1 como
+        # coringa em cada campo. Cada partição guarda só os voos reserváveis
+        # (ativos e com assentos), já ordenados por cada critério de
+        # ORDENACOES, então nenhuma busca precisa ordenar, e os indisponíveis
+        # só aparecem como lápides depois que saem. Parte do estado marcado
+        # em _marcar_indexado, para que índice e marcas concordem.
+        indice = {}
+        linhas = np.flatnonzero(self._reservavel_indexado).astype(np.int32)
+        n = len(linhas)
+        if n == 0:
+            return indice
+
+        n_cidades = len(self.cidades) + 1
+        n_dias = self._ultimo_dia + 2
+        coringa = np.full(n, -1, dtype=np.int32)
+
+        for usa_origem in (True, False):
+            for usa_destino in (True, False):
+                for usa_dia in (True, False):
+                    origem = self.origem[linhas].astype(np.int32) if usa_origem else coringa
+                    destino = self.destino[linhas].astype(np.int32) if usa_destino else coringa
+                    dia = self.dia[linhas] if usa_dia else coringa
+
+                    chave = ((origem + 1) * n_cidades + (destino + 1)) * n_dias + (dia + 1)
+
+                    for criterio in ORDENACOES:
+                        # lexsort é estável: empates ficam em ordem de linha,
+                        # a mesma ordem que Particao mantém nas inserções
+                        valores = self._chave_indexada(criterio)[linhas]
+                        ordem = np.lexsort((valores, chave))
+                        chaves_ordenadas = chave[ordem]
+                        inicios = np.flatnonzero(np.r_[True, chaves_ordenadas[1:] != chaves_ordenadas[:-1]])
+                        fins = np.append(inicios[1:], n)
+                        linhas_ordenadas = linhas[ordem]
+                        valores_ordenados = valores[ordem]
+
+                        for inicio, fim in zip(inicios, fins):
+                            posicao = ordem[inicio]
+                            chave_particao = (int(origem[posicao]), int(destino[posicao]), int(dia[posicao]))
+                            indice.setdefault(chave_particao, {})[criterio] = Particao(
+                                linhas_ordenadas[inicio:fim], valores_ordenados[inicio:fim]
+                            )
+
+        return indice
+
+    def _construir_tarifas(self):
+        # Tabela materializada da menor tarifa reservável por (origem,
+        # destino, dia) e do voo que a oferece (inf e -1 sem voo), tirada do
+        # primeiro voo válido de cada partição por preço do índice. O
+        # coringa -1 de origem e destino ocupa a posição 0. _reindexar
+        # mantém a tabela em dia junto com as partições.
+        n_cidades = len(self.cidades) + 1
+        self.tarifas_minimas = np.full((n_cidades, n_cidades, self._ultimo_dia + 1), np.inf)
+        self.voos_tarifa_minima = np.full(self.tarifas_minimas.shape, -1, dtype=np.int32)
+        for chave, particoes in self.indice.items():
+            if chave[2] >= 0:
+                self._atualizar_tarifa(chave, particoes["preco"])
+
+    def _atualizar_tarifa(self, chave, por_preco):
+        origem, destino, dia = chave
+        posicao = (origem + 1, destino + 1, dia)
+        menor = (np.inf, -1)
+
+        # As lápides de quem esgotou primeiro ficam no começo da partição:
+        # procura o primeiro voo válido em blocos, no principal e nas novas
+        for linhas, chaves in por_preco.trechos():
+            if not por_preco.mortas:
+                if len(linhas):
+                    menor = min(menor, (chaves[0], linhas[0]))
+                continue
+            for inicio in range(0, len(linhas), 64):
+                validas = np.flatnonzero(self._validas(linhas[inicio:inicio + 64], chaves[inicio:inicio + 64], "preco"))
+                if len(validas):
+                    menor = min(menor, (chaves[inicio + validas[0]], linhas[inicio + validas[0]]))
+                    break
+
+        self.tarifas_minimas[posicao], self.voos_tarifa_minima[posicao] = menor
+
+    def _marcar_indexado(self, linhas=slice(None)):
+        # Estado de cada linha como está refletido no índice deste processo
+        self._versao_linha_indexada[linhas] = self.versao_linha[linhas]
+        self._preco_indexado[linhas] = self.preco[linhas]
+        self._reservavel_indexado[linhas] = self._reservaveis(linhas)
+
+    def _validas(self, linhas, chaves, criterio):
+        # Máscara das entradas do índice que ainda valem: a linha continua
+        # reservável e, na ordenação por preço, a chave é o preço indexado
+        validas = self._reservavel_indexado[linhas]
+        if criterio == "preco":
+            validas &= chaves == self._preco_indexado[linhas]
+        return validas
+
+    def _linhas_validas(self, particao, criterio, fim=None):
+        # Linhas da partição (até a posição `fim`) sem as lápides
+        linhas = particao.linhas[:fim]
+        if not particao.mortas:
+            return linhas
+        return linhas[self._validas(linhas, particao.chaves[:fim], criterio)]
+
+    def _compactada(self, particao, criterio):
+        # A mesma partição sem lápides e com as novas já intercaladas
+        if not particao.mortas and particao.novas is None:
+            return particao
+        validas = self._validas(particao.linhas, particao.chaves, criterio)
+        return Particao(particao.linhas[validas], particao.chaves[validas])
+
+    def _particoes_da_linha(self, linha):
+        origem, destino, dia = int(self.origem[linha]), int(self.destino[linha]), int(self.dia[linha])
+        for chave in itertools.product((origem, -1), (destino, -1), (dia, -1)):
+            particoes = self.indice.get(chave)
+            if particoes is None:
+                particoes = self.indice[chave] = {
+                    criterio: Particao.vazia(self._chave_ordenacao(criterio).dtype) for criterio in ORDENACOES
+                }
+            yield chave, particoes
+
+    def _reindexar(self, linha):
+        # Leva ao índice a mudança de uma linha, comparando o estado indexado
+        # com as colunas. Em cada critério a linha vale com uma chave (ou com
+        # nenhuma, se não é reservável): quando ela muda, a entrada antiga
+        # vira lápide, e a nova revive a lápide que a linha já tenha com essa
+        # chave ou entra nas novas da partição. São só buscas binárias, sem
+        # copiar os arrays principais; cada partição alterada é publicada
+        # como uma Particao nova. A menor tarifa do dia é relida da partição
+        # por preço.
+        estava = bool(self._reservavel_indexado[linha])
+        esta = bool(self._reservaveis(linha))
+
+        mudancas = []
+        for criterio in ORDENACOES:
+            antiga = self._chave_indexada(criterio)[linha] if estava else None
+            nova = self._chave_ordenacao(criterio)[linha] if esta else None
+            if antiga != nova:
+                mudancas.append((criterio, antiga is not None, nova))
+
+        # As lápides são reconhecidas pelo estado marcado, que já precisa
+        # ser o novo quando a partição é alterada (ou compactada)
+        self._marcar_indexado(linha)
+
+        for chave, particoes in self._particoes_da_linha(linha) if mudancas else ():
+            for criterio, saiu, nova in mudancas:
+                particao = particoes[criterio]
+                mortas = particao.mortas + saiu
+                if nova is None:
+                    particao = particao.com_mortas(mortas)
+                elif particao.contem(nova, linha):
+                    particao = particao.com_mortas(mortas - 1)
+                else:
+                    particao = particao.com_nova(nova, linha, mortas)
+                if particao.precisa_compactar():
+                    particao = self._compactada(particao, criterio)
+                particoes[criterio] = particao
+            if chave[2] >= 0:
+                self._atualizar_tarifa(chave, particoes["preco"])
+
+    def atualizar_voo(self, linha, preco=None, assentos_disponiveis=None, status=None):
+        # Altera os campos mutáveis de um voo e registra a linha no log da
+        # sua fatia, sem tocar no índice: cada processo (este inclusive)
+        # reindexa as linhas do log antes da próxima consulta
+        # (_garantir_indice_atual). Escritas concorrentes na mesma fatia
+        # precisam ser serializadas por quem chama (ReservasAssentos).
+        if status is not None and status not in self.status:
+            raise ValueError(f"status desconhecido: {status}")
+
+        if assentos_disponiveis is not None:
+            self.assentos_disponiveis[linha] = assentos_disponiveis
+        if status is not None:
+            self.status_voo[linha] = self.status.index(status)
+        if preco is not None:
+            self.preco[linha] = preco
+        self.versao_linha[linha] += 1
+
+        # A linha entra no log antes do contador andar: quem vê o contador
+        # novo já encontra a linha
+        fatia = linha % FATIAS_VERSAO
+        escritas = int(self._contadores[fatia])
+        self._alteracoes[fatia, escritas % TAMANHO_LOG] = linha
+        self._contadores[fatia] = escritas + 1
+
+    def _garantir_indice_atual(self):
+        # Reindexa as linhas alteradas desde a última consulta, lidas do log
+        # de cada fatia cujo contador andou
+        if np.array_equal(self._contadores, self._aplicados):
+            return
+
+        with self._trava_indice:
+            contadores = self._contadores.copy()
+            fatias = np.flatnonzero(contadores != self._aplicados)
+            if not len(fatias):
+                return
+            aplicados = self._aplicados[fatias]
+            linhas = [self._alteracoes[fatia, np.arange(de, ate) % TAMANHO_LOG]
+                      for fatia, de, ate in zip(fatias.tolist(), aplicados.tolist(), contadores[fatias].tolist())]
+            # A escrita em andamento em uma fatia pode estar sobrescrevendo a
+            # entrada mais antiga ainda não contada: se o trecho lido chega a
+            # uma volta do log, as linhas alteradas são as de versao_linha
+            # diferente
+            if int((self._contadores[fatias] - aplicados).max()) >= TAMANHO_LOG:
+                linhas = [np.flatnonzero(self.versao_linha != self._versao_linha_indexada)]
+            for linha in np.unique(np.concatenate(linhas)).tolist():
+                self._reindexar(linha)
+            self._aplicados = contadores
+
+    def _codigo_dia(self, data):
+        try:
+            return date.fromisoformat(data).toordinal() - self.data_base.toordinal()
+        except ValueError:
+            return None
+
+    def _codigo(self, codigos, valor):
+        # -1 quando o filtro não foi informado, None quando o valor não existe
+        if not valor.strip():
+            return -1
+        return codigos.codigo(valor)
+
+    def _intervalo_dias(self, request):
+        # (primeiro, último) dia de data_inicio/data_fim, limitados ao
+        # inventário; um lado vazio fica aberto. None se alguma data for inválida.
+        inicio = self._codigo_dia(request.data_inicio) if request.data_inicio else 0
+        fim = self._codigo_dia(request.data_fim) if request.data_fim else self._ultimo_dia
+        if inicio is None or fim is None:
+            return None
+        return max(inicio, 0), min(fim, self._ultimo_dia)
+
+    def _particao_intervalo(self, origem, destino, inicio, fim, criterios, intercaladas=None):
+        # Partição virtual com os voos de `inicio` a `fim`: só as partições
+        # desses dias são lidas, e suas sequências já ordenadas são
+        # intercaladas (apenas para os critérios que a consulta usa).
+        # `intercaladas` guarda as intercalações para outras consultas do
+        # mesmo lote reaproveitarem.
+        if inicio <= 0 and fim >= self._ultimo_dia:
+            return self.indice.get((origem, destino, -1))
+
+        dias = [self.indice[chave] for chave in ((origem, destino, dia) for dia in range(inicio, fim + 1))
+                if chave in self.indice]
+        if not dias:
+            return None
+
+        intercaladas = intercaladas if intercaladas is not None else {}
+        particao = {}
+        for criterio in criterios:
+            chave = (origem, destino, inicio, fim, criterio)
+            if chave not in intercaladas:
+                intercaladas[chave] = Particao.intercalar([self._compactada(dia[criterio], criterio) for dia in dias])
+            particao[criterio] = intercaladas[chave]
+        return particao
+
+    def _consulta(self, request, intercaladas=None):
+        # Traduz a requisição para (partição, critério, filtros). Devolve
+        # None quando nenhum voo pode casar.
+        self._garantir_indice_atual()
+
+        origem = self._codigo(self._codigos_cidade, request.origem)
+        destino = self._codigo(self._codigos_cidade, request.destino)
+        companhia = self._codigo(self._codigos_companhia, request.companhia_aerea)
+        if origem is None or destino is None or companhia is None:
+            return None
+
+        # Percorre a sequência já ordenada pelo critério pedido; a máscara
+        # apenas descarta quem não casa, preservando a ordem
+        criterio = request.ordenacao if request.ordenacao in ORDENACOES else ORDENACOES[0]
+        filtros = {
+            "preco_max": request.preco_max,
+            "companhia": companhia,
+            "faixa": FAIXAS.index(request.faixa_horario) if request.faixa_horario in FAIXAS_HORARIO else -1,
+        }
+
+        # `data` tem precedência; sem ela, data_inicio/data_fim definem um
+        # intervalo de dias (datas flexíveis)
+        if request.data or not (request.data_inicio or request.data_fim):
+            dia = self._codigo_dia(request.data) if request.data else -1
+            if dia is None:
+                return None
+            particao = self.indice.get((origem, destino, dia))
+        else:
+            intervalo = self._intervalo_dias(request)
+            if intervalo is None or intervalo[0] > intervalo[1]:
+                return None
+            criterios = {criterio, "preco", "horario"} if filtros["preco_max"] > 0 or filtros["faixa"] >= 0 \
+                else {criterio}
+            particao = self._particao_intervalo(origem, destino, *intervalo, criterios, intercaladas)
+
+        if particao is None:
+            return None
+        return particao, criterio, filtros
+
+    def _resolver(self, request, intercaladas=None):
+        # Traduz a requisição para (candidatos ordenados, chaves, filtros
+        # residuais): os candidatos estão em ordem de (chave, linha), com a
+        # chave de ordenação de cada um em `chaves`. Devolve None quando
+        # nenhum voo pode casar.
+        consulta = self._consulta(request, intercaladas)
+        if consulta is None:
+            return None
+
+        particao, criterio, filtros = consulta
+        ordenacao = particao[criterio]
+        candidatos, chaves = ordenacao.linhas, ordenacao.chaves
+        # Partição com lápides: a máscara também descarta as inválidas
+        filtros["lapides"] = (chaves, criterio) if ordenacao.mortas else None
+
+        if request.preco_max > 0:
+            # Na ordenação por preço, preco_max vira uma busca binária: os
+            # voos dentro do orçamento são um prefixo da partição. Nas outras
+            # ordenações o prefixo só compensa quando é pequeno; aí ele é
+            # reordenado pelo critério pedido (empates por linha, como no índice)
+            por_preco = particao["preco"]
+            dentro = por_preco.quantidade_ate(request.preco_max)
+            if criterio == "preco":
+                candidatos, chaves = candidatos[:dentro], chaves[:dentro]
+                if filtros["lapides"] is not None:
+                    filtros["lapides"] = (chaves, criterio)
+                filtros["preco_max"] = 0
+            elif dentro * 4 <= len(por_preco):
+                prefixo = np.sort(self._linhas_validas(por_preco, "preco", dentro))
+                chaves = self._chave_ordenacao(criterio)[prefixo]
+                ordem = np.argsort(chaves, kind="stable")
+                candidatos, chaves = prefixo[ordem], chaves[ordem]
+                filtros["lapides"] = None
+                filtros["preco_max"] = 0
+
+        if filtros["faixa"] >= 0 and criterio == "horario" and candidatos is ordenacao.linhas:
+            # Em ordem de horário, as partidas de uma faixa são um trecho
+            # contíguo da partição: duas buscas binárias nos minutos
+            inicio, fim = ordenacao.intervalo(*FAIXAS_HORARIO[request.faixa_horario])
+            candidatos, chaves = candidatos[inicio:fim], chaves[inicio:fim]
+            if filtros["lapides"] is not None:
+                filtros["lapides"] = (chaves, criterio)
+            filtros["faixa"] = -1
+
+        return candidatos, chaves, filtros
+
+    def _tem_filtros(self, filtros):
+        return filtros["preco_max"] > 0 or filtros["companhia"] >= 0 or filtros["faixa"] >= 0 or \
+            filtros["lapides"] is not None
+
+    def _mascara(self, candidatos, filtros, inicio=0, fim=None):
+        # Uma única máscara booleana combinando todos os filtros residuais
+        # para candidatos[inicio:fim]; disponibilidade só entra pelas
+        # lápides, porque o índice só tem reserváveis
+        linhas = candidatos[inicio:fim]
+        mascara = np.ones(len(linhas), dtype=bool)
+
+        if filtros["lapides"] is not None:
+            chaves, criterio = filtros["lapides"]
+            mascara &= self._validas(linhas, chaves[inicio:fim], criterio)
+
+        if filtros["preco_max"] > 0:
+            mascara &= self.preco[linhas] <= filtros["preco_max"]
+
+        if filtros["companhia"] >= 0:
+            mascara &= self.companhia[linhas] == filtros["companhia"]
+
+        if filtros["faixa"] >= 0:
+            mascara &= self.faixa_partida[linhas] == filtros["faixa"]
+
+        return mascara
+
+    def buscar(self, request, intercaladas=None):
+        resolvido = self._resolver(request, intercaladas)
+        if resolvido is None:
+            return np.empty(0, dtype=np.int32)
+
+        candidatos, _, filtros = resolvido
+        if not self._tem_filtros(filtros):
+            return candidatos
+        return candidatos[self._mascara(candidatos, filtros)]
+
+    def _percorrer(self, candidatos, filtros, posicao, tamanho_bloco):
+        # Avalia a máscara bloco a bloco a partir de `posicao`, devolvendo as
+        # posições (na sequência ordenada) que casam com os filtros
+        tem_filtros = self._tem_filtros(filtros)
+        for inicio in range(posicao, len(candidatos), tamanho_bloco):
+            bloco = candidatos[inicio:inicio + tamanho_bloco]
+            if not tem_filtros:
+                yield np.arange(inicio, inicio + len(bloco))
+            else:
+                yield np.flatnonzero(self._mascara(candidatos, filtros, inicio, inicio + len(bloco))) + inicio
+
+    def iterar_lotes(self, request, tamanho_lote):
+        # Gera as linhas que casam com a consulta em lotes de `tamanho_lote`,
+        # já na ordem pedida. Só um bloco da partição é avaliado por vez.
+        resolvido = self._resolver(request)
+        if resolvido is None:
+            return
+
+        candidatos, _, filtros = resolvido
+        pendentes = np.empty(0, dtype=candidatos.dtype)
+        for posicoes in self._percorrer(candidatos, filtros, 0, tamanho_lote):
+            pendentes = np.concatenate((pendentes, candidatos[posicoes]))
+            while len(pendentes) >= tamanho_lote:
+                yield pendentes[:tamanho_lote]
+                pendentes = pendentes[tamanho_lote:]
+
+        if len(pendentes):
+            yield pendentes
+
+    def buscar_pagina(self, request, tamanho, cursor=None, total=None, intercaladas=None):
+        # Seleciona os próximos `tamanho` voos depois de `cursor`, o par
+        # (chave, linha) do último voo entregue: a página continua na
+        # primeira entrada maior que ele na sequência ordenada, então voos
+        # que saem da partição entre uma página e outra (lotados, com status
+        # novo, lápides compactadas) não deslocam os seguintes. Devolve
+        # (linhas, cursor da última linha, total, fim), com `fim` verdadeiro
+        # quando nenhum voo casa depois da página. Sem `total` (primeira
+        # página) a máscara cobre a partição inteira para contar os
+        # resultados; nas páginas seguintes o total vem do token e a partição
+        # é percorrida em blocos só até completar a página e achar um voo
+        # além dela, sem reavaliar o que já foi entregue.
+        resolvido = self._resolver(request, intercaladas)
+        if resolvido is None:
+            return np.empty(0, dtype=np.int32), cursor, 0 if total is None else total, True
+
+        candidatos, chaves, filtros = resolvido
+        posicao = 0
+        if cursor is not None:
+            chave, linha = cursor
+            posicao = Particao._posicao(candidatos, chaves, chave, linha + 1)
+
+        if not self._tem_filtros(filtros):
+            # Sem filtros residuais toda a partição casa: a página é um recorte
+            posicoes = np.arange(posicao, min(posicao + tamanho + 1, len(candidatos)))
+            if total is None:
+                total = len(candidatos) - posicao
+        elif total is None:
+            posicoes = np.flatnonzero(self._mascara(candidatos, filtros, posicao)) + posicao
+            total = len(posicoes)
+        else:
+            blocos = []
+            encontrados = 0
+            for posicoes in self._percorrer(candidatos, filtros, posicao, max(tamanho * 4, 256)):
+                blocos.append(posicoes[:tamanho + 1 - encontrados])
+                encontrados += len(blocos[-1])
+                if encontrados > tamanho:
+                    break
+            posicoes = np.concatenate(blocos) if blocos else np.empty(0, dtype=np.int64)
+
+        pagina = posicoes[:tamanho]
+        if len(pagina):
+            ultima = int(pagina[-1])
+            cursor = (chaves[ultima].item(), int(candidatos[ultima]))
+        return candidatos[pagina], cursor, total, len(posicoes) <= tamanho
+
+    def facetas(self, request, largura_faixa_preco, intercaladas=None):
+        # Contagem dos resultados da consulta por companhia, faixa de horário,
+        # classe e faixa de preço (de `largura_faixa_preco`, com a última
+        # faixa aberta). Cada faceta ignora o próprio filtro: a contagem de
+        # uma companhia é o total que a consulta teria com ela no lugar da
+        # companhia pedida. A partição é a mesma da busca (com `intercaladas`
+        # compartilhado, o intervalo de datas é intercalado uma vez só), e
+        # cada faceta é um bincount da coluna de códigos sob a máscara dos
+        # outros filtros. Devolve None quando nenhum voo pode casar.
+        consulta = self._consulta(request, intercaladas)
+        if consulta is None:
+            return None
+
+        # As contagens não dependem da ordem: com as linhas em ordem
+        # crescente as colunas são lidas sequencialmente
+        particao, criterio, filtros = consulta
+        linhas = np.sort(self._linhas_validas(particao[criterio], criterio))
+        precos = self.preco[linhas]
+        companhias = self.companhia[linhas]
+        faixas = self.faixa_partida[linhas]
+
+        preco = precos <= filtros["preco_max"] if filtros["preco_max"] > 0 else None
+        companhia = companhias == filtros["companhia"] if filtros["companhia"] >= 0 else None
+        faixa = faixas == filtros["faixa"] if filtros["faixa"] >= 0 else None
+
+        def contar(codigos, mascaras, tamanho):
+            mascaras = [mascara for mascara in mascaras if mascara is not None]
+            if mascaras:
+                codigos = codigos[np.logical_and.reduce(mascaras)]
+            return np.bincount(codigos, minlength=tamanho)
+
+        # Faixas de preço a partir de zero; as acima de FAIXAS_PRECO_MAX
+        # caem na última. Preços são positivos, então truncar a divisão é o
+        # mesmo que arredondar para baixo (e bem mais barato que //)
+        faixas_preco = np.minimum(precos / largura_faixa_preco, FAIXAS_PRECO_MAX - 1).astype(np.intp)
+        contagens_preco = contar(faixas_preco, (companhia, faixa), FAIXAS_PRECO_MAX)
+
+        # Partidas fora das faixas (código -1) ficam no primeiro contador
+        contagens_faixa = contar(faixas.astype(np.intp) + 1, (preco, companhia), len(FAIXAS) + 1)[1:]
+        return {
+            "companhia_aerea": self._nomes_contagens(
+                self.companhias, contar(companhias.astype(np.intp), (preco, faixa), len(self.companhias))),
+            "faixa_horario": self._nomes_contagens(FAIXAS, contagens_faixa),
+            "classe_economica": self._nomes_contagens(
+                self.classes, contar(self.classe[linhas].astype(np.intp), (preco, companhia, faixa), len(self.classes))),
+            "preco": [(int(posicao) * largura_faixa_preco, int(contagens_preco[posicao]))
+                      for posicao in np.flatnonzero(contagens_preco)],
+        }
+
+    @staticmethod
+    def _nomes_contagens(nomes, contagens):
+        # [(nome, quantidade)] dos códigos com pelo menos um voo
+        return [(nomes[codigo], int(contagens[codigo])) for codigo in np.flatnonzero(contagens)]
+
+    def calendario(self, origem, destino, data_inicio="", dias=60):
+        # Menor tarifa de cada um dos `dias` dias a partir de data_inicio
+        # (vazia: primeiro dia do inventário), lida da tabela materializada.
+        # Devolve (primeiro dia, tarifas, linhas), com inf e -1 nos dias sem
+        # voo reservável, ou None se a cidade ou a data não existir.
+        self._garantir_indice_atual()
+
+        origem = self._codigo(self._codigos_cidade, origem)
+        destino = self._codigo(self._codigos_cidade, destino)
+        inicio = self._codigo_dia(data_inicio) if data_inicio else 0
+        if origem is None or destino is None or inicio is None:
+            return None
+
+        inicio = max(inicio, 0)
+        fim = max(min(inicio + dias, self._ultimo_dia + 1), inicio)
+        return (inicio, self.tarifas_minimas[origem + 1, destino + 1, inicio:fim],
+                self.voos_tarifa_minima[origem + 1, destino + 1, inicio:fim])
+
+    def data(self, dia):
+        if dia not in self._datas:
+            self._datas[dia] = date.fromordinal(self.data_base.toordinal() + dia).isoformat()
+        return self._datas[dia]
+
+    @staticmethod
+    def id_do_voo(linha):
+        return f"V{linha + 1:04d}"
+
+    def linha_do_id(self, voo_id):
+        # Inverso do id gerado em voo(): "V0042" -> linha 41; None se não existir
+        numero = voo_id[1:]
+        if not voo_id.startswith("V") or not (numero.isascii() and numero.isdigit()):
+            return None
+        linha = int(numero) - 1
+        return linha if 0 <= linha < len(self) else None
+
+    @staticmethod
+    def campos_da_mascara(mascara):
+        # Campos de Voo pedidos em uma FieldMask, na ordem de CAMPOS_VOO;
+        # None quando a máscara está vazia ou pede todos (o Voo inteiro)
+        pedidos = set(mascara.paths)
+        desconhecidos = pedidos.difference(CAMPOS_VOO)
+        if desconhecidos:
+            raise MascaraCamposInvalida(f"campos inexistentes em Voo: {', '.join(sorted(desconhecidos))}")
+        if not pedidos or len(pedidos) == len(CAMPOS_VOO):
+            return None
+        return tuple(campo for campo in CAMPOS_VOO if campo in pedidos)
+
+    def voo(self, linha, campos=None):
+        # Materializa a mensagem Voo de uma única linha do inventário; com
+        # `campos` (de campos_da_mascara), só esses campos são calculados
+        if campos is None:
+            campos = CAMPOS_VOO
+        return voos_service_pb2.Voo(**{campo: VALORES_VOO[campo](self, linha) for campo in campos})
+
+    def voos(self, linhas):
+        return [self.voo(int(linha)) for linha in linhas]
+
+    def _cache_serializados(self, campos):
+        # Bytes em cache por linha para a máscara `campos`: a lista de todos
+        # os voos para o Voo inteiro, um _VoosProjetados (criado vazio na
+        # primeira consulta com a máscara) para as outras
+        if campos is None:
+            return self._voos_serializados
+        with self._trava_projecoes:
+            cache = self._voos_projetados.pop(campos, None)
+            if cache is None:
+                cache = _VoosProjetados()
+                if len(self._voos_projetados) >= MASCARAS_EM_CACHE:
+                    del self._voos_projetados[next(iter(self._voos_projetados))]
+            # Reinserida no fim: o dict fica em ordem de uso
+            self._voos_projetados[campos] = cache
+            return cache
+
+    def voo_serializado(self, linha, campos=None, cache=None):
+        # Bytes do voo (só com `campos`, se informados) já enquadrados como
+        # um elemento do campo `voos` (tag + tamanho + mensagem). Calculados
+        # na primeira vez e reaproveitados enquanto versao_linha do voo não
+        # mudar.
+        cache = cache if cache is not None else self._cache_serializados(campos)
+        versao = self.versao_linha[linha]
+        entrada = cache[linha]
+        if entrada is None or entrada[0] != versao:
+            entrada = (versao, enquadrar(self.voo(linha, campos).SerializeToString()))
+            cache[linha] = entrada
+        return entrada[1]
+
+    def voos_serializados(self, linhas, campos=None):
+        cache = self._cache_serializados(campos)
+        return b"".join([self.voo_serializado(int(linha), campos, cache) for linha in linhas])
+
+
+def _partida(inventario, linha):
+    return int(inventario.partida_minutos[linha])
+
+
+def _chegada(inventario, linha):
+    return (_partida(inventario, linha) + int(inventario.duracao_minutos[linha])) % (24 * 60)
+
+
+def _partida_timestamp(inventario, linha):
+    return int(inventario.partida_timestamp[linha])
+
+
+# Valor de cada campo de Voo a partir das colunas: voo() calcula só os
+# campos pedidos
+VALORES_VOO = {
+    "id": lambda inventario, linha: inventario.id_do_voo(linha),
+    "origem": lambda inventario, linha: inventario.cidades[inventario.origem[linha]],
+    "destino": lambda inventario, linha: inventario.cidades[inventario.destino[linha]],
+    "data": lambda inventario, linha: inventario.data(int(inventario.dia[linha])),
+    "horario_partida": lambda inventario, linha: HORARIOS[_partida(inventario, linha)],
+    "horario_chegada": lambda inventario, linha: HORARIOS[_chegada(inventario, linha)],
+    "preco": lambda inventario, linha: float(inventario.preco[linha]),
+    "companhia_aerea": lambda inventario, linha: inventario.companhias[inventario.companhia[linha]],
+    "numero_voo": lambda inventario, linha:
+        f"{inventario.prefixos_voo[inventario.prefixo_voo[linha]]}{inventario.numero_voo[linha]}",
+    "assentos_disponiveis": lambda inventario, linha: int(inventario.assentos_disponiveis[linha]),
+    "status": lambda inventario, linha: inventario.status[inventario.status_voo[linha]],
+    "classe_economica": lambda inventario, linha: inventario.classes[inventario.classe[linha]],
+    "aeronave": lambda inventario, linha: inventario.aeronaves[inventario.aeronave[linha]],
+    "duracao_minutos": lambda inventario, linha: int(inventario.duracao_minutos[linha]),
+    "partida_minutos": _partida,
+    "chegada_minutos": _chegada,
+    "partida_timestamp": _partida_timestamp,
+    "chegada_timestamp": lambda inventario, linha:
+        _partida_timestamp(inventario, linha) + int(inventario.duracao_minutos[linha]) * 60,
+}
@@ -0,0 +1,272 @@
+from collections import namedtuple
+
+import numpy as np
+
+MINUTOS_DIA = 24 * 60
+
+# Tempo mínimo e máximo entre a chegada de um trecho e a partida do
+# seguinte, no mesmo aeroporto
+CONEXAO_MIN_PADRAO = 45
+CONEXAO_MAX_PADRAO = 6 * 60
+
+MAX_CONEXOES = 2
+LIMITE_PADRAO = 10
+LIMITE_MAX = 100
+
+# Critérios de ordenação dos itinerários; o primeiro é o padrão
+ORDENACOES_ITINERARIO = ("preco", "duracao")
+
+# Trechos do itinerário (linhas do inventário), preço total e minutos da
+# primeira partida até a última chegada
+Itinerario = namedtuple("Itinerario", ["linhas", "preco", "duracao_minutos"])
+
+_SEM_TRECHO = -1
+_VAZIO = np.empty(0, dtype=np.int32)
+
+
+class ConsultaItinerariosInvalida(ValueError):
+    pass
+
+
+def _conexoes(chegadas, partidas, conexao_min, conexao_max):
+    # Junção por janela de tempo: liga cada chegada às partidas (ordenadas)
+    # entre chegada + conexao_min e chegada + conexao_max. Devolve os pares
+    # como (posições em `chegadas`, posições em `partidas`).
+    inicio = np.searchsorted(partidas, chegadas + conexao_min, side="left")
+    fim = np.searchsorted(partidas, chegadas + conexao_max, side="right")
+    quantidade = np.maximum(fim - inicio, 0)
+    antes = np.cumsum(quantidade) - quantidade
+    deslocamento = np.arange(int(quantidade.sum())) - np.repeat(antes, quantidade)
+    return np.repeat(np.arange(len(chegadas)), quantidade), np.repeat(inicio, quantidade) + deslocamento
+
+
+def _minimo_sufixo(valores, neutro):
+    # minimo[i] = min(valores[i:]); a posição extra no fim vale `neutro`
+    minimo = np.append(valores, neutro)
+    return np.minimum.accumulate(minimo[::-1])[::-1]
+
+
+class _Melhores:
+    # As `limite` melhores combinações vistas até agora, já ordenadas. O
+    # pior valor entre elas vira o teto (de preço ou de duração) que uma
+    # combinação nova precisa respeitar para ainda entrar.
+
+    def __init__(self, limite, por_preco, preco_max, duracao_max):
+        self.limite = limite
+        self.por_preco = por_preco
+        self.preco_max = preco_max
+        self.duracao_max = duracao_max
+        self.trechos = np.empty((0, MAX_CONEXOES + 1), dtype=np.int32)
+        self.preco = np.empty(0)
+        self.duracao = np.empty(0, dtype=np.int64)
+
+    def tetos(self):
+        # (preço máximo, duração máxima) de uma combinação que ainda entra
+        preco_max, duracao_max = self.preco_max, self.duracao_max
+        if len(self.preco) == self.limite:
+            if self.por_preco:
+                preco_max = min(preco_max, self.preco[-1])
+            else:
+                duracao_max = min(duracao_max, self.duracao[-1])
+        return preco_max, duracao_max
+
+    def adicionar(self, trechos, preco, duracao):
+        preco_max, duracao_max = self.tetos()
+        dentro = (preco <= preco_max) & (duracao <= duracao_max)
+        if not dentro.any():
+            return
+
+        completos = np.full((int(dentro.sum()), MAX_CONEXOES + 1), _SEM_TRECHO, dtype=np.int32)
+        completos[:, :trechos.shape[1]] = trechos[dentro]
+        trechos = np.concatenate((self.trechos, completos))
+        preco = np.concatenate((self.preco, preco[dentro]))
+        duracao = np.concatenate((self.duracao, duracao[dentro]))
+
+        # Empates pelo outro critério, depois menos conexões, depois linhas
+        conexoes = (trechos != _SEM_TRECHO).sum(axis=1)
+        primario, secundario = (preco, duracao) if self.por_preco else (duracao, preco)
+        ordem = np.lexsort((*trechos.T[::-1], conexoes, secundario, primario))[:self.limite]
+        self.trechos, self.preco, self.duracao = trechos[ordem], preco[ordem], duracao[ordem]
+
+    def itinerarios(self):
+        return [
+            Itinerario(tuple(int(linha) for linha in trechos if linha != _SEM_TRECHO), float(preco), int(duracao))
+            for trechos, preco, duracao in zip(self.trechos, self.preco, self.duracao)
+        ]
+
+
+class BuscaItinerarios:
+    # Itinerários de até duas conexões sobre um grafo expandido no tempo: os
+    # nós são (aeroporto, instante) e as arestas são os voos reserváveis. As
+    # listas de adjacência por aeroporto e dia já existem no índice do
+    # inventário (partição (origem, destino ou -1, dia) ordenada por
+    # horário) e são mantidas por ele a cada alteração; aqui só se calculam
+    # os instantes absolutos de partida e chegada, em minutos.
+    #
+    # As conexões são junções por janela de tempo feitas com busca binária
+    # sobre as partidas ordenadas. Diretos e uma conexão são calculados
+    # primeiro; o pior dos K melhores vira o teto para as duas conexões, que
+    # são podadas por limites inferiores (o menor preço e a chegada mais
+    # cedo de um último trecho que ainda dá para pegar) antes de combinar
+    # os três trechos.
+
+    def __init__(self, inventario):
+        self.inventario = inventario
+        self.partida = inventario.dia.astype(np.int64) * MINUTOS_DIA + inventario.partida_minutos
+        self.chegada = self.partida + inventario.duracao_minutos
+
+    def _saidas(self, origem, destino, partida_min, partida_max):
+        # Voos reserváveis de `origem` (para `destino`, ou qualquer um com
+        # -1) partindo entre os dois instantes, em ordem de partida. As
+        # partições de dias consecutivos concatenadas já ficam em ordem de
+        # instante absoluto.
+        inventario = self.inventario
+        indice = inventario.indice
+        primeiro_dia = max(int(partida_min) // MINUTOS_DIA, 0)
+        ultimo_dia = min(int(partida_max) // MINUTOS_DIA, inventario._ultimo_dia)
+        partes = [inventario._linhas_validas(indice[chave]["horario"], "horario")
+                  for chave in ((origem, destino, dia) for dia in range(primeiro_dia, ultimo_dia + 1))
+                  if chave in indice]
+        if not partes:
+            return _VAZIO
+        linhas = np.concatenate(partes)
+        partidas = self.partida[linhas]
+        return linhas[np.searchsorted(partidas, partida_min, side="left"):
+                      np.searchsorted(partidas, partida_max, side="right")]
+
+    def _seguintes(self, chegadas, origem, destino, conexao_min, conexao_max):
+        # Voos que podem seguir alguma das chegadas em `origem`
+        if not len(chegadas):
+            return _VAZIO
+        return self._saidas(origem, destino, chegadas.min() + conexao_min, chegadas.max() + conexao_max)
+
+    def _parametros(self, request):
+        inventario = self.inventario
+        if not (request.origem.strip() and request.destino.strip() and request.data):
+            raise ConsultaItinerariosInvalida("origem, destino e data são obrigatórios")
+
+        dia = inventario._codigo_dia(request.data)
+        if dia is None:
+            raise ConsultaItinerariosInvalida(f"data inválida: {request.data}")
+
+        max_conexoes = request.max_conexoes or 1
+        conexao_min = request.conexao_min_minutos or CONEXAO_MIN_PADRAO
+        conexao_max = request.conexao_max_minutos or CONEXAO_MAX_PADRAO
+        if not 1 <= max_conexoes <= MAX_CONEXOES:
+            raise ConsultaItinerariosInvalida(f"max_conexoes deve estar entre 1 e {MAX_CONEXOES}")
+        if conexao_min < 0 or conexao_max < conexao_min:
+            raise ConsultaItinerariosInvalida("janela de conexão inválida")
+
+        criterio = request.ordenacao if request.ordenacao in ORDENACOES_ITINERARIO else ORDENACOES_ITINERARIO[0]
+        return {
+            "origem": inventario._codigos_cidade.codigo(request.origem),
+            "destino": inventario._codigos_cidade.codigo(request.destino),
+            "dia": dia,
+            "max_conexoes": max_conexoes,
+            "conexao_min": conexao_min,
+            "conexao_max": conexao_max,
+            "melhores": _Melhores(
+                min(request.limite, LIMITE_MAX) if request.limite > 0 else LIMITE_PADRAO,
+                criterio == "preco",
+                request.preco_max if request.preco_max > 0 else np.inf,
+                request.duracao_max_minutos if request.duracao_max_minutos > 0 else np.inf,
+            ),
+        }
+
+    def buscar(self, request):
+        # Devolve os melhores itinerários (lista de Itinerario) pela
+        # ordenação pedida. Levanta ConsultaItinerariosInvalida se faltar
+        # origem, destino ou data ou se algum parâmetro for inválido.
+        p = self._parametros(request)
+        origem, destino, melhores = p["origem"], p["destino"], p["melhores"]
+        if origem is None or destino is None or origem == destino:
+            return []
+
+        self.inventario._garantir_indice_atual()
+        inicio_dia = p["dia"] * MINUTOS_DIA
+        fim_dia = inicio_dia + MINUTOS_DIA - 1
+
+        diretos = self._saidas(origem, destino, inicio_dia, fim_dia)
+        melhores.adicionar(diretos[:, None], self.inventario.preco[diretos],
+                           self.chegada[diretos] - self.partida[diretos])
+
+        # Primeiros trechos de cada itinerário com conexão, por aeroporto
+        # da primeira conexão
+        primeiros = self._saidas(origem, -1, inicio_dia, fim_dia)
+        escalas = self.inventario.destino[primeiros]
+        por_escala = {int(escala): primeiros[escalas == escala]
+                      for escala in np.unique(escalas) if escala != destino}
+
+        for escala, chegando in por_escala.items():
+            self._uma_conexao(chegando, escala, destino, p)
+        if p["max_conexoes"] >= 2:
+            for escala, chegando in por_escala.items():
+                self._duas_conexoes(chegando, escala, origem, destino, p)
+
+        return melhores.itinerarios()
+
+    def _uma_conexao(self, primeiros, escala, destino, p):
+        preco = self.inventario.preco
+        segundos = self._seguintes(self.chegada[primeiros], escala, destino, p["conexao_min"], p["conexao_max"])
+        i, j = _conexoes(self.chegada[primeiros], self.partida[segundos], p["conexao_min"], p["conexao_max"])
+        primeiros, segundos = primeiros[i], segundos[j]
+        p["melhores"].adicionar(
+            np.column_stack((primeiros, segundos)),
+            preco[primeiros] + preco[segundos],
+            self.chegada[segundos] - self.partida[primeiros],
+        )
+
+    def _duas_conexoes(self, primeiros, escala, origem, destino, p):
+        preco = self.inventario.preco
+        melhores = p["melhores"]
+        conexao_min, conexao_max = p["conexao_min"], p["conexao_max"]
+
+        segundos = self._seguintes(self.chegada[primeiros], escala, -1, conexao_min, conexao_max)
+        segundas_escalas = self.inventario.destino[segundos]
+        manter = (segundas_escalas != origem) & (segundas_escalas != destino)
+        segundos, segundas_escalas = segundos[manter], segundas_escalas[manter]
+
+        # Limites inferiores do resto do caminho a partir de cada segundo
+        # trecho: menor preço e chegada mais cedo entre os últimos trechos
+        # que partem depois da conexão mínima (ignorar a máxima só afrouxa)
+        resto_preco = np.full(len(segundos), np.inf)
+        resto_chegada = np.full(len(segundos), np.iinfo(np.int64).max)
+        terceiros_por_escala = {}
+        for segunda_escala in np.unique(segundas_escalas):
+            nesta = np.flatnonzero(segundas_escalas == segunda_escala)
+            chegadas = self.chegada[segundos[nesta]]
+            terceiros = self._seguintes(chegadas, int(segunda_escala), destino, conexao_min, conexao_max)
+            if not len(terceiros):
+                continue
+            posicao = np.searchsorted(self.partida[terceiros], chegadas + conexao_min, side="left")
+            resto_preco[nesta] = _minimo_sufixo(preco[terceiros], np.inf)[posicao]
+            resto_chegada[nesta] = _minimo_sufixo(self.chegada[terceiros], np.iinfo(np.int64).max)[posicao]
+            terceiros_por_escala[int(segunda_escala)] = terceiros
+
+        preco_max, duracao_max = melhores.tetos()
+        limite_preco = preco[segundos] + resto_preco
+        manter = np.isfinite(limite_preco) & (limite_preco + preco[primeiros].min() <= preco_max)
+        segundos, limite_preco, resto_chegada = segundos[manter], limite_preco[manter], resto_chegada[manter]
+        if not len(segundos):
+            return
+
+        i, j = _conexoes(self.chegada[primeiros], self.partida[segundos], conexao_min, conexao_max)
+        manter = (preco[primeiros[i]] + limite_preco[j] <= preco_max) & \
+            (resto_chegada[j] - self.partida[primeiros[i]] <= duracao_max)
+        primeiros, segundos = primeiros[i[manter]], segundos[j[manter]]
+        segundas_escalas = self.inventario.destino[segundos]
+
+        for segunda_escala, terceiros in terceiros_por_escala.items():
+            nesta = segundas_escalas == segunda_escala
+            if not nesta.any():
+                continue
+            a, b = primeiros[nesta], segundos[nesta]
+            i, k = _conexoes(self.chegada[b], self.partida[terceiros], conexao_min, conexao_max)
+            a, b, c = a[i], b[i], terceiros[k]
+            melhores.adicionar(
+                np.column_stack((a, b, c)),
+                # Somado na mesma ordem do limite inferior, para a poda
+                # nunca descartar um empate por arredondamento
+                preco[a] + (preco[b] + preco[c]),
+                self.chegada[c] - self.partida[a],
+            )
@@ -0,0 +1,96 @@
+import json
+from datetime import date
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from internal.blocos import dispor_blocos, gravar_blocos, ler_bloco
+from internal.inventario import FATIAS_VERSAO, TAMANHO_LOG
+
+# Layout do segmento:
+#   [0, 8)    mágico
+#   [8, 16)   tamanho do JSON de metadados (uint64)
+#   [16, ...) JSON de metadados (dicionários, data base, colunas)
+#   contadores de escritas (uint64, um por fatia), log das linhas
+#   alteradas (int32, fatias x TAMANHO_LOG) e colunas em sequência, cada
+#   bloco alinhado como em internal.blocos
+MAGICO = b"VOOSSHM3"
+_OFFSET_TAMANHO_META = 8
+_OFFSET_META = 16
+
+
+class SegmentoInventario:
+    # Inventário colunar em um segmento de memória compartilhada. As colunas
+    # são arrays NumPy apontando direto para o segmento (sem cópia), então
+    # todos os processos que anexam enxergam os mesmos dados. O processo que
+    # cria o segmento é o dono e o remove em fechar().
+
+    def __init__(self, shm, dono):
+        self.shm = shm
+        self.dono = dono
+
+        buf = shm.buf
+        if bytes(buf[:len(MAGICO)]) != MAGICO:
+            raise ValueError(f"segmento {shm.name} não contém um inventário de voos")
+
+        tamanho_meta = int(np.frombuffer(buf, dtype=np.uint64, count=1, offset=_OFFSET_TAMANHO_META)[0])
+        meta = json.loads(bytes(buf[_OFFSET_META:_OFFSET_META + tamanho_meta]).decode())
+
+        self.dicionarios = meta["dicionarios"]
+        self.data_base = date.fromisoformat(meta["data_base"])
+        fatias, tamanho_log = meta["log"]
+        self.contadores = ler_bloco(buf, np.uint64, fatias, meta["contadores"])
+        self.alteracoes = ler_bloco(buf, np.int32, (fatias, tamanho_log), meta["alteracoes"])
+        self.colunas = {
+            nome: ler_bloco(buf, tipo, meta["linhas"], offset)
+            for nome, tipo, offset in meta["colunas"]
+        }
+
+    @property
+    def nome(self):
+        return self.shm.name
+
+    @classmethod
+    def criar(cls, colunas, dicionarios, data_base, nome=None, contadores=None):
+        linhas = len(next(iter(colunas.values())))
+        blocos = [
+            np.zeros(FATIAS_VERSAO, dtype=np.uint64) if contadores is None else np.asarray(contadores, dtype=np.uint64),
+            np.zeros((FATIAS_VERSAO, TAMANHO_LOG), dtype=np.int32),
+            *colunas.values(),
+        ]
+
+        def montar_meta(offsets):
+            return {
+                "linhas": linhas,
+                "data_base": data_base.isoformat(),
+                "dicionarios": dicionarios,
+                "log": [FATIAS_VERSAO, TAMANHO_LOG],
+                "contadores": offsets[0],
+                "alteracoes": offsets[1],
+                "colunas": [(coluna, valores.dtype.str, offset)
+                            for (coluna, valores), offset in zip(colunas.items(), offsets[2:])],
+            }
+
+        meta_json, offsets, tamanho = dispor_blocos(_OFFSET_META, [valores.nbytes for valores in blocos], montar_meta)
+        shm = shared_memory.SharedMemory(name=nome, create=True, size=tamanho)
+        shm.buf[:len(MAGICO)] = MAGICO
+        shm.buf[_OFFSET_TAMANHO_META:_OFFSET_META] = np.array([len(meta_json)], dtype=np.uint64).tobytes()
+        shm.buf[_OFFSET_META:_OFFSET_META + len(meta_json)] = meta_json
+        gravar_blocos(shm.buf, blocos, offsets)
+
+        return cls(shm, dono=True)
+
+    @classmethod
+    def anexar(cls, nome):
+        # Os workers são iniciados pelo multiprocessing e compartilham o
+        # resource_tracker do dono, então anexar não muda quem remove o segmento
+        return cls(shared_memory.SharedMemory(name=nome), dono=False)
+
+    def fechar(self):
+        # As views NumPy precisam ser soltas antes de fechar o mapeamento
+        self.colunas = {}
+        self.contadores = None
+        self.alteracoes = None
+        self.shm.close()
+        if self.dono:
+            self.shm.unlink()
@@ -0,0 +1,57 @@
+import heapq
+import itertools
+import math
+from collections import namedtuple
+from datetime import date, timedelta
+
+# Noites quando a data de volta não é informada
+NOITES_PADRAO = 3
+
+Pacote = namedtuple("Pacote", ["voo", "hotel", "checkin", "checkout", "noites", "preco_total"])
+
+
+def estadia(checkin, data_volta=""):
+    # (checkin, checkout, noites) de uma estadia, com pelo menos uma noite.
+    # Sem data de volta (ou com uma anterior à ida), o checkout é
+    # checkin + NOITES_PADRAO.
+    entrada = date.fromisoformat(checkin)
+    saida = date.fromisoformat(data_volta) if data_volta else entrada + timedelta(days=NOITES_PADRAO)
+    if saida <= entrada:
+        saida = entrada + timedelta(days=NOITES_PADRAO)
+    return checkin, saida.isoformat(), (saida - entrada).days
+
+
+class JuncaoPacotes:
+    # Junção top-K de voos com hotéis pelo preço total (voo + noites x
+    # diária), best-first. Os hotéis vêm ordenados por diária, então para
+    # um mesmo voo o total só cresce com a posição do hotel: cada voo entra
+    # no heap com o hotel mais barato e, quando sai, volta com o próximo.
+    # O heap tem no máximo uma combinação por voo, e nenhuma combinação
+    # acima do orçamento entra nele.
+    #
+    # Os voos podem chegar aos poucos (páginas em ordem de preço): extrair
+    # só libera os pacotes que nenhum voo ainda não visto pode superar.
+
+    def __init__(self, hoteis, orcamento_max=0):
+        self.hoteis = hoteis
+        self.orcamento_max = orcamento_max if orcamento_max > 0 else math.inf
+        self._heap = []
+        self._sequencia = itertools.count()
+
+    def _empilhar(self, voo, estadia_voo, posicao_hotel):
+        total = voo.preco + estadia_voo[2] * self.hoteis[posicao_hotel].price
+        if total <= self.orcamento_max:
+            # A sequência desempata em ordem de chegada sem comparar mensagens
+            heapq.heappush(self._heap, (total, next(self._sequencia), voo, estadia_voo, posicao_hotel))
+
+    def adicionar(self, voo, estadia_voo):
+        if self.hoteis:
+            self._empilhar(voo, estadia_voo, 0)
+
+    def extrair_ate(self, teto=math.inf):
+        # Gera os pacotes em ordem de preço total enquanto o total for <= teto
+        while self._heap and self._heap[0][0] <= teto:
+            total, _, voo, estadia_voo, posicao_hotel = heapq.heappop(self._heap)
+            yield Pacote(voo, self.hoteis[posicao_hotel], *estadia_voo, total)
+            if posicao_hotel + 1 < len(self.hoteis):
+                self._empilhar(voo, estadia_voo, posicao_hotel + 1)
@@ -0,0 +1,122 @@
+import threading
+from collections import Counter, namedtuple
+
+from internal.inventario import FATIAS_VERSAO, STATUS_ATIVO
+
+STATUS_LOTADO = "lotado"
+
+# Quantidade padrão de listras: voos em listras diferentes são reservados
+# em paralelo, voos na mesma listra disputam a mesma trava
+LISTRAS_PADRAO = 64
+
+Reserva = namedtuple("Reserva", ["voo_id", "sucesso", "assentos_disponiveis", "status", "mensagem"])
+
+
+class ReservaInvalida(ValueError):
+    pass
+
+
+class VooNaoEncontrado(LookupError):
+    pass
+
+
+class TravasVoos:
+    # Lock striping: a linha i do inventário é protegida pela trava
+    # i % len(listras), em vez de uma trava global para todos os voos.
+    # `fabrica` permite usar travas entre processos (multiprocessing.Lock)
+    # quando o inventário está em memória compartilhada.
+    #
+    # Com a quantidade de listras dividindo FATIAS_VERSAO, linhas da mesma
+    # fatia de versão do inventário caem sempre na mesma listra: a listra
+    # serializa também o contador e o log da fatia, e nenhuma reserva
+    # passa por uma trava global.
+
+    def __init__(self, listras=LISTRAS_PADRAO, fabrica=threading.Lock):
+        if listras <= 0 or FATIAS_VERSAO % listras:
+            raise ValueError(f"a quantidade de listras precisa dividir {FATIAS_VERSAO}: {listras}")
+        self.listras = [fabrica() for _ in range(listras)]
+
+    def travas_de(self, linhas):
+        # Travas distintas em ordem crescente de listra: todo lote adquire
+        # na mesma ordem, então dois lotes nunca esperam um pelo outro
+        return [self.listras[i] for i in sorted({linha % len(self.listras) for linha in linhas})]
+
+
+class ReservasAssentos:
+    def __init__(self, inventario, travas=None):
+        self.inventario = inventario
+        self.travas = travas if travas is not None else TravasVoos()
+
+    def _linhas(self, pedidos):
+        linhas = []
+        for voo_id, quantidade in pedidos:
+            linha = self.inventario.linha_do_id(voo_id)
+            if linha is None:
+                raise VooNaoEncontrado(f"voo {voo_id} não encontrado")
+            if quantidade <= 0:
+                raise ReservaInvalida(f"quantidade inválida para o voo {voo_id}: {quantidade}")
+            linhas.append(linha)
+        return linhas
+
+    def _motivo_recusa(self, linha, quantidade):
+        inventario = self.inventario
+        if inventario.status[inventario.status_voo[linha]] != STATUS_ATIVO:
+            return f"voo {inventario.status[inventario.status_voo[linha]]}"
+        if inventario.assentos_disponiveis[linha] < quantidade:
+            return f"apenas {inventario.assentos_disponiveis[linha]} assentos disponíveis"
+        return None
+
+    def _reserva(self, voo_id, linha, sucesso, mensagem):
+        inventario = self.inventario
+        return Reserva(
+            voo_id=voo_id,
+            sucesso=sucesso,
+            assentos_disponiveis=int(inventario.assentos_disponiveis[linha]),
+            status=inventario.status[inventario.status_voo[linha]],
+            mensagem=mensagem,
+        )
+
+    def reservar(self, pedidos):
+        # pedidos: [(voo_id, quantidade)]. Tudo ou nada: ou todos os pedidos
+        # são reservados, ou nenhum. Devolve (sucesso, [Reserva por pedido]).
+        if not pedidos:
+            raise ReservaInvalida("nenhuma reserva informada")
+
+        linhas = self._linhas(pedidos)
+        por_linha = Counter()
+        for linha, (_, quantidade) in zip(linhas, pedidos):
+            por_linha[linha] += quantidade
+
+        travas = self.travas.travas_de(por_linha)
+        for trava in travas:
+            trava.acquire()
+        try:
+            # Um mesmo voo pode aparecer mais de uma vez no lote: a recusa
+            # considera a soma pedida para ele
+            recusas = {}
+            for linha, quantidade in por_linha.items():
+                motivo = self._motivo_recusa(linha, quantidade)
+                if motivo is not None:
+                    recusas[linha] = motivo
+
+            if recusas:
+                return False, [
+                    self._reserva(voo_id, linha, False, recusas.get(linha, "não reservado: outro voo do lote foi recusado"))
+                    for linha, (voo_id, _) in zip(linhas, pedidos)
+                ]
+
+            for linha, quantidade in por_linha.items():
+                restantes = int(self.inventario.assentos_disponiveis[linha]) - quantidade
+                self.inventario.atualizar_voo(
+                    linha,
+                    assentos_disponiveis=restantes,
+                    status=STATUS_LOTADO if restantes == 0 else None,
+                )
+
+            return True, [
+                self._reserva(voo_id, linha, True, "reserva confirmada")
+                for linha, (voo_id, _) in zip(linhas, pedidos)
+            ]
+        finally:
+            for trava in reversed(travas):
+                trava.release()
@@ -0,0 +1,173 @@
+import json
+import mmap
+import os
+import zlib
+from datetime import date
+
+import numpy as np
+
+from internal.blocos import dispor_blocos, gravar_blocos, ler_bloco
+from internal.inventario import InventarioVoos, Particao, ORDENACOES
+
+# Layout do arquivo:
+#   [0, 8)    mágico
+#   [8, 16)   versão do formato (uint64)
+#   [16, 24)  tamanho do JSON de metadados (uint64)
+#   [24, 32)  crc32 do JSON de metadados (uint64)
+#   [32, ...) JSON de metadados (dicionários, contadores, parâmetros de
+#             geração, blocos)
+#   blocos em sequência, alinhados como em internal.blocos: primeiro as
+#   colunas, depois o índice (chaves das partições, limites e, por critério
+#   de ordenação, as linhas e as chaves de ordenação)
+MAGICO = b"VOOSSNP1"
+VERSAO_FORMATO = 3
+_OFFSET_META = 32
+
+
+class SnapshotInvalido(ValueError):
+    pass
+
+
+def _crc(valores):
+    return zlib.crc32(memoryview(np.ascontiguousarray(valores)).cast("B"))
+
+
+def _blocos_indice(inventario):
+    # Achata o dicionário de partições: as linhas (e as chaves de ordenação)
+    # de todas as partições, já compactadas, ficam concatenadas em um array
+    # por critério, e `limites` diz onde cada partição começa e termina
+    # (igual para todos os critérios)
+    indice = {
+        chave: {criterio: inventario._compactada(particoes[criterio], criterio) for criterio in ORDENACOES}
+        for chave, particoes in list(inventario.indice.items())
+    }
+    chaves = list(indice)
+    tamanhos = [len(indice[chave][ORDENACOES[0]]) for chave in chaves]
+    limites = np.zeros(len(chaves) + 1, dtype=np.int64)
+    np.cumsum(tamanhos, out=limites[1:])
+
+    blocos = {
+        "chaves": np.array(chaves, dtype=np.int32).reshape(-1, 3),
+        "limites": limites,
+    }
+    for criterio in ORDENACOES:
+        particoes = [indice[chave][criterio] for chave in chaves]
+        blocos[criterio] = np.concatenate([p.linhas for p in particoes] or [np.empty(0, dtype=np.int32)])
+        blocos[f"{criterio}_chaves"] = np.concatenate([p.chaves for p in particoes] or [np.empty(0)])
+    return blocos
+
+
+def _indice_de_blocos(blocos):
+    # Partições como views dos arrays do snapshot, sem copiar as linhas
+    limites = blocos["limites"].tolist()
+    indice = {}
+    for i, chave in enumerate(blocos["chaves"].tolist()):
+        inicio, fim = limites[i], limites[i + 1]
+        indice[tuple(chave)] = {
+            criterio: Particao(blocos[criterio][inicio:fim], blocos[f"{criterio}_chaves"][inicio:fim])
+            for criterio in ORDENACOES
+        }
+    return indice
+
+
+def salvar_snapshot(inventario, caminho, parametros=None):
+    # Grava colunas e índice do inventário, junto com os `parametros` (um
+    # dict serializável em JSON) com que ele foi gerado. O arquivo é escrito
+    # ao lado e renomeado no fim, então leitores nunca veem um snapshot pela
+    # metade.
+    inventario._garantir_indice_atual()
+
+    grupos = {"colunas": inventario.colunas, "indice": _blocos_indice(inventario)}
+    blocos = [(grupo, nome, valores) for grupo, arrays in grupos.items() for nome, valores in arrays.items()]
+    crcs = [_crc(valores) for _, _, valores in blocos]
+
+    def montar_meta(offsets):
+        meta = {
+            "linhas": len(inventario),
+            "data_base": inventario.data_base.isoformat(),
+            "dicionarios": inventario.dicionarios,
+            "contadores": [int(c) for c in inventario._contadores],
+            "parametros": parametros,
+        }
+        for grupo in grupos:
+            meta[grupo] = []
+        for (grupo, nome, valores), offset, crc in zip(blocos, offsets, crcs):
+            meta[grupo].append([nome, valores.dtype.str, list(valores.shape), offset, crc])
+        return meta
+
+    meta_json, offsets, tamanho = dispor_blocos(
+        _OFFSET_META, [valores.nbytes for _, _, valores in blocos], montar_meta
+    )
+
+    temporario = f"{caminho}.tmp"
+    with open(temporario, "wb+") as arquivo:
+        arquivo.truncate(tamanho)
+        with mmap.mmap(arquivo.fileno(), tamanho) as mapa:
+            mapa[:len(MAGICO)] = MAGICO
+            cabecalho = np.array([VERSAO_FORMATO, len(meta_json), zlib.crc32(meta_json)], dtype=np.uint64)
+            mapa[len(MAGICO):_OFFSET_META] = cabecalho.tobytes()
+            mapa[_OFFSET_META:_OFFSET_META + len(meta_json)] = meta_json
+            gravar_blocos(mapa, [valores for _, _, valores in blocos], offsets)
+            mapa.flush()
+        os.fsync(arquivo.fileno())
+    os.replace(temporario, caminho)
+
+
+def carregar_snapshot(caminho, verificar=True, parametros=None):
+    # Mapeia o snapshot em memória (copy-on-write: alterações no inventário
+    # não voltam para o arquivo) e monta o inventário sobre os arrays
+    # mapeados, com o índice pronto. Levanta SnapshotInvalido se o arquivo
+    # estiver vazio ou truncado, se o formato for outro, se algum checksum
+    # não bater ou se o snapshot foi gerado com parâmetros diferentes de
+    # `parametros` (quando informados).
+    with open(caminho, "rb") as arquivo:
+        if os.fstat(arquivo.fileno()).st_size < _OFFSET_META:
+            raise SnapshotInvalido(f"{caminho} não é um snapshot de inventário")
+        mapa = mmap.mmap(arquivo.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    try:
+        return _montar_inventario(caminho, mapa, verificar, parametros)
+    except SnapshotInvalido:
+        raise
+    except (ValueError, KeyError, TypeError) as erro:
+        # Metadados que não decodificam ou não têm o formato esperado
+        raise SnapshotInvalido(f"{caminho}: metadados inválidos ({erro})") from erro
+
+
+def _montar_inventario(caminho, mapa, verificar, parametros):
+    if mapa[:len(MAGICO)] != MAGICO:
+        raise SnapshotInvalido(f"{caminho} não é um snapshot de inventário")
+
+    versao_formato, tamanho_meta, crc_meta = np.frombuffer(mapa, dtype=np.uint64, count=3, offset=len(MAGICO)).tolist()
+    if versao_formato != VERSAO_FORMATO:
+        raise SnapshotInvalido(f"{caminho}: formato {versao_formato}, esperado {VERSAO_FORMATO}")
+
+    meta_json = mapa[_OFFSET_META:_OFFSET_META + tamanho_meta]
+    if zlib.crc32(meta_json) != crc_meta:
+        raise SnapshotInvalido(f"{caminho}: metadados corrompidos")
+    meta = json.loads(meta_json.decode())
+    if parametros is not None and meta.get("parametros") != parametros:
+        raise SnapshotInvalido(f"{caminho}: gerado com {meta.get('parametros')}, esperado {parametros}")
+
+    grupos = {}
+    for grupo in ("colunas", "indice"):
+        grupos[grupo] = {}
+        for nome, tipo, forma, offset, crc in meta[grupo]:
+            if offset + int(np.prod(forma)) * np.dtype(tipo).itemsize > len(mapa):
+                raise SnapshotInvalido(f"{caminho}: bloco {grupo}/{nome} truncado")
+
+            valores = ler_bloco(mapa, tipo, forma, offset)
+            if verificar and _crc(valores) != crc:
+                raise SnapshotInvalido(f"{caminho}: checksum do bloco {grupo}/{nome} não confere")
+            grupos[grupo][nome] = valores
+
+    inventario = InventarioVoos(
+        grupos["colunas"],
+        meta["dicionarios"],
+        date.fromisoformat(meta["data_base"]),
+        np.array(meta["contadores"], dtype=np.uint64),
+        _indice_de_blocos(grupos["indice"]),
+    )
+    # Mantém o mapeamento vivo enquanto o inventário existir
+    inventario._snapshot = mapa
+    return inventario
@@ -0,0 +1,56 @@
+import voos_service_v2_pb2
+from internal.dicionarios import normalizar
+from internal.inventario import VALORES_VOO, enquadrar
+
+
+def _valores_enum(enum, prefixo, nomes):
+    # Valor do enum para cada código de um dicionário do inventário
+    # ("Primeira Classe" -> CLASSE_PRIMEIRA_CLASSE); 0 (desconhecido) para
+    # nomes que o enum não tem
+    valores = dict(enum.items())
+    return [valores.get(prefixo + normalizar(nome).upper().replace(" ", "_"), 0) for nome in nomes]
+
+
+class SerializadorV2:
+    # Voos do inventário no esquema voos.v2: enums no lugar dos textos de
+    # status, classe e companhia (resolvidos uma vez por código dos
+    # dicionários), timestamps e centavos no lugar de data, horários e
+    # preço. Os bytes de cada voo ficam em cache enquanto versao_linha não
+    # mudar, como em InventarioVoos.voo_serializado.
+
+    def __init__(self, inventario):
+        self.inventario = inventario
+        self._status = _valores_enum(voos_service_v2_pb2.StatusVoo, "STATUS_VOO_", inventario.status)
+        self._classes = _valores_enum(voos_service_v2_pb2.Classe, "CLASSE_", inventario.classes)
+        self._companhias = _valores_enum(voos_service_v2_pb2.Companhia, "COMPANHIA_", inventario.companhias)
+        self._voos_serializados = [None] * len(inventario)
+
+    def voo(self, linha):
+        inventario = self.inventario
+        partida = int(inventario.partida_timestamp[linha])
+        return voos_service_v2_pb2.Voo(
+            id=inventario.id_do_voo(linha),
+            origem=inventario.cidades[inventario.origem[linha]],
+            destino=inventario.cidades[inventario.destino[linha]],
+            partida=partida,
+            chegada=partida + int(inventario.duracao_minutos[linha]) * 60,
+            preco_centavos=round(float(inventario.preco[linha]) * 100),
+            companhia=self._companhias[inventario.companhia[linha]],
+            numero_voo=VALORES_VOO["numero_voo"](inventario, linha),
+            assentos_disponiveis=int(inventario.assentos_disponiveis[linha]),
+            status=self._status[inventario.status_voo[linha]],
+            classe=self._classes[inventario.classe[linha]],
+            aeronave=inventario.aeronaves[inventario.aeronave[linha]]
+        )
+
+    def voo_serializado(self, linha):
+        # Bytes do voo enquadrados como um elemento do campo `voos`
+        versao = self.inventario.versao_linha[linha]
+        entrada = self._voos_serializados[linha]
+        if entrada is None or entrada[0] != versao:
+            entrada = (versao, enquadrar(self.voo(linha).SerializeToString()))
+            self._voos_serializados[linha] = entrada
+        return entrada[1]
+
+    def voos_serializados(self, linhas):
+        return b"".join([self.voo_serializado(int(linha)) for linha in linhas])
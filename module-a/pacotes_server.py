@@ -0,0 +1,183 @@
+import asyncio
+import math
+import os
+import time
+from datetime import date
+import grpc
+import hotel_pb2
+import hotel_pb2_grpc
+import pacotes_service_pb2
+import pacotes_service_pb2_grpc
+import voos_service_pb2
+import voos_service_pb2_grpc
+from prometheus_client import start_http_server, Counter, Histogram
+from internal.dicionarios import ALIASES_CIDADES, DicionarioCodigos
+from internal.gerador import CIDADES
+from internal.pacotes import JuncaoPacotes, NOITES_PADRAO, estadia
+
+# Métricas Prometheus
+GRPC_REQUESTS_TOTAL = Counter(
+    'grpc_pacotes_requests_total',
+    'Total de requisições gRPC recebidas',
+    ['method', 'status']
+)
+
+GRPC_REQUEST_DURATION = Histogram(
+    'grpc_pacotes_request_duration_seconds',
+    'Duração das requisições gRPC',
+    ['method']
+)
+
+PACOTES_ENVIADOS_TOTAL = Counter(
+    'pacotes_enviados_total',
+    'Total de pacotes enviados'
+)
+
+# Serviços consultados e portas deste serviço
+VOOS_ENDERECO = os.environ.get("VOOS_SERVICE_ENDERECO", "localhost:50051")
+HOTEIS_ENDERECO = os.environ.get("HOTEIS_SERVICE_ENDERECO", "localhost:50052")
+PORTA = int(os.environ.get("PACOTES_PORTA", "50053"))
+PORTA_METRICAS = int(os.environ.get("PACOTES_PORTA_METRICAS", "8001"))
+
+LIMITE_PADRAO = 10
+LIMITE_MAX = 100
+
+# O serviço de hotéis compara a cidade pelo nome: apelidos e grafias sem
+# acento viram o nome canônico antes da chamada
+CIDADES_HOTEIS = DicionarioCodigos(CIDADES, ALIASES_CIDADES)
+
+def _erro_requisicao(request):
+    # Mensagem de erro da requisição, ou None se ela for válida
+    if not (request.origem.strip() and request.destino.strip()):
+        return "origem e destino são obrigatórios"
+    for campo in ("data", "data_volta"):
+        valor = getattr(request, campo)
+        try:
+            if valor:
+                date.fromisoformat(valor)
+        except ValueError:
+            return f"{campo} inválida: {valor}"
+    return None
+
+class PacotesServiceImpl(pacotes_service_pb2_grpc.PacotesServiceServicer):
+    # Monta os pacotes aqui em vez de no gateway: voos e hotéis são
+    # consultados ao mesmo tempo, os voos já em ordem de preço e só uma
+    # página de `limite` voos por vez, e a junção best-first (JuncaoPacotes)
+    # envia cada pacote assim que nenhum outro mais barato pode aparecer
+
+    def __init__(self, canal_voos, canal_hoteis):
+        self.voos = voos_service_pb2_grpc.VoosServiceStub(canal_voos)
+        self.hoteis = hotel_pb2_grpc.HotelServiceStub(canal_hoteis)
+
+    async def BuscarPacotes(self, request, context):
+        inicio_processamento = time.time()
+
+        erro = _erro_requisicao(request)
+        if erro is not None:
+            GRPC_REQUESTS_TOTAL.labels(method='BuscarPacotes', status='error').inc()
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, erro)
+
+        try:
+            async for pacote in self._pacotes(request):
+                PACOTES_ENVIADOS_TOTAL.inc()
+                yield pacote
+
+            GRPC_REQUESTS_TOTAL.labels(method='BuscarPacotes', status='success').inc()
+            GRPC_REQUEST_DURATION.labels(method='BuscarPacotes').observe(time.time() - inicio_processamento)
+        except grpc.aio.AioRpcError as e:
+            # Falha em um dos serviços consultados: repassa o código
+            GRPC_REQUESTS_TOTAL.labels(method='BuscarPacotes', status='error').inc()
+            await context.abort(e.code(), f"falha ao consultar voos ou hotéis: {e.details()}")
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='BuscarPacotes', status='error').inc()
+            raise
+
+    async def _pacotes(self, request):
+        limite = min(request.limite, LIMITE_MAX) if request.limite > 0 else LIMITE_PADRAO
+
+        # Com a data da ida a estadia é a mesma para todos os voos; sem ela o
+        # check-in é a data de cada voo e a estadia tem ao menos uma noite
+        estadia_fixa = estadia(request.data, request.data_volta) if request.data else None
+        noites_min = estadia_fixa[2] if estadia_fixa else (1 if request.data_volta else NOITES_PADRAO)
+
+        consulta_voos = voos_service_pb2.ConsultaVoosRequest(
+            origem=request.origem,
+            destino=request.destino,
+            data=request.data,
+            data_inicio=request.data_inicio,
+            data_fim=request.data_fim,
+            preco_max=request.orcamento_max,
+            ordenacao="preco",
+            page_size=limite
+        )
+        busca_hoteis = hotel_pb2.SearchHotelsRequest(
+            city=CIDADES_HOTEIS.nome(request.destino) or request.destino,
+            min_stars=request.min_estrelas,
+            max_price=request.orcamento_max / noites_min if request.orcamento_max > 0 else 0,
+            order_by="price"
+        )
+
+        pagina, resposta_hoteis = await asyncio.gather(
+            self.voos.ConsultarVoos(consulta_voos),
+            self.hoteis.SearchHotels(busca_hoteis)
+        )
+        hoteis = sorted((hotel for hotel in resposta_hoteis.hotels if hotel.available), key=lambda hotel: hotel.price)
+        juncao = JuncaoPacotes(hoteis, request.orcamento_max)
+
+        enviados = 0
+        while hoteis:
+            for voo in pagina.voos:
+                juncao.adicionar(voo, estadia_fixa or estadia(voo.data, request.data_volta))
+
+            # Voos das próximas páginas custam ao menos o último desta, então
+            # nenhum pacote com eles sai por menos que `teto`
+            teto = math.inf
+            if pagina.next_page_token and pagina.voos:
+                teto = pagina.voos[-1].preco + noites_min * hoteis[0].price
+
+            for pacote in juncao.extrair_ate(teto):
+                yield pacotes_service_pb2.Pacote(
+                    voo=pacote.voo,
+                    hotel=pacote.hotel,
+                    checkin=pacote.checkin,
+                    checkout=pacote.checkout,
+                    noites=pacote.noites,
+                    preco_total=round(pacote.preco_total, 2)
+                )
+                enviados += 1
+                if enviados == limite:
+                    return
+
+            # Uma página vazia também encerra: o voos-service não deve mandar
+            # token nela, mas um token sem voos faria o laço girar à toa
+            if not pagina.next_page_token or not pagina.voos:
+                return
+            consulta_voos.page_token = pagina.next_page_token
+            pagina = await self.voos.ConsultarVoos(consulta_voos)
+
+async def serve_aio():
+    async with grpc.aio.insecure_channel(VOOS_ENDERECO) as canal_voos, \
+            grpc.aio.insecure_channel(HOTEIS_ENDERECO) as canal_hoteis:
+        server = grpc.aio.server()
+        pacotes_service_pb2_grpc.add_PacotesServiceServicer_to_server(
+            PacotesServiceImpl(canal_voos, canal_hoteis), server
+        )
+
+        server.add_insecure_port(f'0.0.0.0:{PORTA}')
+        await server.start()
+
+        print(f"🚀 Servidor gRPC de Pacotes rodando na porta {PORTA} (voos em {VOOS_ENDERECO}, hotéis em {HOTEIS_ENDERECO})")
+        print("Pressione Ctrl+C para parar")
+
+        await server.wait_for_termination()
+
+def serve():
+    # Iniciar servidor HTTP para métricas Prometheus
+    start_http_server(PORTA_METRICAS)
+    print(f"📊 Servidor de métricas Prometheus rodando na porta {PORTA_METRICAS}")
+
+    asyncio.run(serve_aio())
+
+if __name__ == '__main__':
+    serve()
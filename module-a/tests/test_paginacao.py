@@ -0,0 +1,116 @@
+import os
+import sys
+from datetime import date
+
+MODULO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(MODULO)
+sys.path.append(os.path.join(MODULO, 'proto'))
+
+import voos_service_pb2
+from internal.gerador import gerar_inventario, SEMENTE_PADRAO
+from internal.inventario import InventarioVoos, STATUS_ATIVO
+from voos_server import VoosServiceImpl
+
+TOTAL_VOOS = 20_000
+TAMANHO_PAGINA = 10
+
+
+def _servico():
+    inventario = InventarioVoos(*gerar_inventario(TOTAL_VOOS, SEMENTE_PADRAO, date(2025, 1, 1)))
+    return VoosServiceImpl(inventario)
+
+
+def _consulta(inventario, **campos):
+    return voos_service_pb2.ConsultaVoosRequest(
+        origem=inventario.cidades[0], destino=inventario.cidades[1], page_size=TAMANHO_PAGINA, **campos
+    )
+
+
+def _paginas(servico, request, depois_da_pagina):
+    # Todas as linhas entregues, chamando depois_da_pagina(linhas) entre
+    # uma página e a seguinte
+    entregues = []
+    while True:
+        linhas, proximo_token, _ = servico._paginar(request)
+        entregues.extend(int(linha) for linha in linhas)
+        if not proximo_token:
+            return entregues
+        depois_da_pagina(linhas)
+        request.page_token = proximo_token
+
+
+def _lotar(inventario):
+    def lotar(linhas):
+        for linha in linhas:
+            inventario.atualizar_voo(int(linha), assentos_disponiveis=0)
+    return lotar
+
+
+def test_paginas_nao_pulam_voos_quando_entregues_lotam():
+    # Cada página lota os voos que entregou: as lápides (e a compactação
+    # que elas disparam) não podem deslocar os voos ainda não entregues
+    for ordenacao in ("preco", "horario", "duracao"):
+        servico = _servico()
+        request = _consulta(servico.inventario, ordenacao=ordenacao)
+        esperados = [int(linha) for linha in servico._aplicar_filtros(request)]
+        assert len(esperados) > 8 * TAMANHO_PAGINA
+
+        assert _paginas(servico, request, _lotar(servico.inventario)) == esperados
+
+
+def test_paginas_de_intervalo_de_datas_nao_pulam_voos_quando_entregues_lotam():
+    # A partição do intervalo é intercalada de novo a cada página, já sem
+    # os voos que lotaram
+    for ordenacao in ("preco", "horario"):
+        servico = _servico()
+        request = _consulta(servico.inventario, ordenacao=ordenacao, data_inicio="2025-01-03", data_fim="2025-02-01")
+        esperados = [int(linha) for linha in servico._aplicar_filtros(request)]
+        assert len(esperados) > 2 * TAMANHO_PAGINA
+
+        assert _paginas(servico, request, _lotar(servico.inventario)) == esperados
+
+
+def test_paginas_nao_pulam_voos_com_filtros_residuais():
+    servico = _servico()
+    request = _consulta(servico.inventario, ordenacao="horario", companhia_aerea=servico.inventario.companhias[0])
+    esperados = [int(linha) for linha in servico._aplicar_filtros(request)]
+    assert len(esperados) > 2 * TAMANHO_PAGINA
+
+    assert _paginas(servico, request, _lotar(servico.inventario)) == esperados
+
+
+def test_paginacao_continua_com_voos_que_voltam_depois_da_primeira_pagina():
+    # O total da primeira página fica velho quando voos voltam a ser
+    # reserváveis; eles ainda precisam aparecer no fim da paginação
+    servico = _servico()
+    inventario = servico.inventario
+    request = _consulta(inventario, ordenacao="preco")
+    esperados = [int(linha) for linha in servico._aplicar_filtros(request)]
+
+    rota = (inventario.origem == inventario.origem[esperados[0]]) & \
+        (inventario.destino == inventario.destino[esperados[0]])
+    voltam = sorted(set(rota.nonzero()[0].tolist()) - set(esperados))[:TAMANHO_PAGINA]
+    assert len(voltam) == TAMANHO_PAGINA
+    preco = float(inventario.preco[esperados[-1]]) + 1
+
+    def reabrir(linhas):
+        for linha in voltam:
+            if inventario.assentos_disponiveis[linha] == 0 or \
+                    inventario.status[inventario.status_voo[linha]] != STATUS_ATIVO:
+                inventario.atualizar_voo(linha, preco=preco, assentos_disponiveis=10, status=STATUS_ATIVO)
+
+    assert _paginas(servico, request, reabrir) == esperados + voltam
+
+
+def test_token_de_outra_consulta_e_recusado():
+    servico = _servico()
+    request = _consulta(servico.inventario, ordenacao="preco")
+    _, proximo_token, _ = servico._paginar(request)
+
+    outra = _consulta(servico.inventario, ordenacao="horario", page_token=proximo_token)
+    try:
+        servico._paginar(outra)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("token aceito em outra consulta")
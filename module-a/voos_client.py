@@ -1,25 +1,50 @@
 import grpc
+from google.protobuf import field_mask_pb2
 import voos_service_pb2
 import voos_service_pb2_grpc
+import voos_service_v2_pb2_grpc
 from datetime import datetime, timedelta
 
 class VoosClient:
     def __init__(self, host='localhost', port=50051):
         self.channel = grpc.insecure_channel(f'{host}:{port}')
         self.stub = voos_service_pb2_grpc.VoosServiceStub(self.channel)
+        self.stub_v2 = voos_service_v2_pb2_grpc.VoosServiceStub(self.channel)
     
-    def consultar_voos(self, origem=None, destino=None, data=None, 
-                      preco_max=0, companhia_aerea=None, faixa_horario=None, 
-                      ordenacao="preco"):
-        request = voos_service_pb2.ConsultaVoosRequest(
+    def _montar_consulta(self, origem=None, destino=None, data=None,
+                         preco_max=0, companhia_aerea=None, faixa_horario=None,
+                         ordenacao="preco", page_size=0, page_token=None,
+                         data_inicio=None, data_fim=None, incluir_facetas=False,
+                         largura_faixa_preco=0, campos=None):
+        return voos_service_pb2.ConsultaVoosRequest(
             origem=origem or "",
             destino=destino or "",
             data=data or "",
             preco_max=preco_max,
             companhia_aerea=companhia_aerea or "",
             faixa_horario=faixa_horario or "",
-            ordenacao=ordenacao
+            ordenacao=ordenacao,
+            page_size=page_size,
+            page_token=page_token or "",
+            data_inicio=data_inicio or "",
+            data_fim=data_fim or "",
+            incluir_facetas=incluir_facetas,
+            largura_faixa_preco=largura_faixa_preco,
+            campos=field_mask_pb2.FieldMask(paths=campos) if campos else None
         )
+
+    def consultar_voos(self, origem=None, destino=None, data=None, 
+                      preco_max=0, companhia_aerea=None, faixa_horario=None, 
+                      ordenacao="preco", page_size=0, page_token=None,
+                      data_inicio=None, data_fim=None, incluir_facetas=False,
+                      largura_faixa_preco=0, campos=None):
+        # Sem `data`, data_inicio/data_fim (inclusivos) buscam um intervalo de
+        # dias; com incluir_facetas a resposta traz as contagens em `facetas`.
+        # `campos` (nomes de campos de Voo) limita o que vem em cada voo.
+        request = self._montar_consulta(origem, destino, data, preco_max, companhia_aerea,
+                                        faixa_horario, ordenacao, page_size, page_token,
+                                        data_inicio, data_fim, incluir_facetas,
+                                        largura_faixa_preco, campos)
         
         try:
             response = self.stub.ConsultarVoos(request)
@@ -28,6 +53,105 @@ class VoosClient:
             print(f"Erro na consulta: {e}")
             return None
     
+    def consultar_voos_stream(self, origem=None, destino=None, data=None,
+                              preco_max=0, companhia_aerea=None, faixa_horario=None,
+                              ordenacao="preco", tamanho_lote=0, campos=None):
+        # Gera os lotes de voos (listas de Voo) conforme chegam do servidor
+        request = self._montar_consulta(origem, destino, data, preco_max, companhia_aerea,
+                                        faixa_horario, ordenacao, page_size=tamanho_lote,
+                                        campos=campos)
+
+        try:
+            for lote in self.stub.ConsultarVoosStream(request):
+                yield list(lote.voos)
+        except grpc.RpcError as e:
+            print(f"Erro na consulta: {e}")
+    
+    def consultar_voos_v2(self, **consulta):
+        # Mesmos argumentos de consultar_voos; a resposta vem no esquema
+        # compacto voos.v2 (enums, timestamps e preços em centavos)
+        request = self._montar_consulta(**consulta)
+
+        try:
+            return self.stub_v2.ConsultarVoos(request)
+        except grpc.RpcError as e:
+            print(f"Erro na consulta: {e}")
+            return None
+
+    def consultar_voos_lote(self, consultas):
+        # consultas: lista de dicts com os mesmos argumentos de
+        # consultar_voos; as respostas vêm na mesma ordem
+        request = voos_service_pb2.ConsultaVoosLoteRequest(
+            consultas=[self._montar_consulta(**consulta) for consulta in consultas]
+        )
+
+        try:
+            return list(self.stub.ConsultarVoosLote(request).respostas)
+        except grpc.RpcError as e:
+            print(f"Erro na consulta: {e}")
+            return None
+
+    def calendario_precos(self, origem=None, destino=None, data_inicio=None, dias=0):
+        # Menor tarifa por dia (TarifaDia), a partir de data_inicio
+        request = voos_service_pb2.CalendarioPrecosRequest(
+            origem=origem or "",
+            destino=destino or "",
+            data_inicio=data_inicio or "",
+            dias=dias
+        )
+
+        try:
+            return self.stub.CalendarioPrecos(request)
+        except grpc.RpcError as e:
+            print(f"Erro na consulta: {e}")
+            return None
+
+    def reservar_assentos(self, voo_id, quantidade=1):
+        request = voos_service_pb2.ReservaAssentosRequest(voo_id=voo_id, quantidade=quantidade)
+
+        try:
+            return self.stub.ReservarAssentos(request)
+        except grpc.RpcError as e:
+            print(f"Erro na reserva: {e}")
+            return None
+
+    def reservar_assentos_lote(self, reservas):
+        # reservas: lista de (voo_id, quantidade); tudo ou nada
+        request = voos_service_pb2.ReservaAssentosLoteRequest(reservas=[
+            voos_service_pb2.ReservaAssentosRequest(voo_id=voo_id, quantidade=quantidade)
+            for voo_id, quantidade in reservas
+        ])
+
+        try:
+            return self.stub.ReservarAssentosLote(request)
+        except grpc.RpcError as e:
+            print(f"Erro na reserva: {e}")
+            return None
+
+    def consultar_itinerarios(self, origem, destino, data, max_conexoes=1, preco_max=0,
+                              duracao_max_minutos=0, conexao_min_minutos=0, conexao_max_minutos=0,
+                              ordenacao="preco", limite=0):
+        # Itinerários com até `max_conexoes` conexões (no máximo 2); os
+        # valores 0 usam os padrões do servidor
+        request = voos_service_pb2.ConsultaItinerariosRequest(
+            origem=origem,
+            destino=destino,
+            data=data,
+            max_conexoes=max_conexoes,
+            preco_max=preco_max,
+            duracao_max_minutos=duracao_max_minutos,
+            conexao_min_minutos=conexao_min_minutos,
+            conexao_max_minutos=conexao_max_minutos,
+            ordenacao=ordenacao,
+            limite=limite
+        )
+
+        try:
+            return self.stub.ConsultarItinerarios(request)
+        except grpc.RpcError as e:
+            print(f"Erro na consulta: {e}")
+            return None
+
     def close(self):
         self.channel.close()
 
@@ -2,78 +2,72 @@ from flask import Flask, request, jsonify
 from flask_cors import CORS
 import time
 import random
-from datetime import datetime, timedelta
+import os
+import re
+from datetime import date
+import voos_service_pb2
+from internal.inventario import InventarioVoos, CAMPOS_VOO, FAIXAS_HORARIO
+from internal.gerador import gerar_inventario, SEMENTE_PADRAO
+from internal.dicionarios import ALIASES_CIDADES, ALIASES_COMPANHIAS, DicionarioCodigos
 
 app = Flask(__name__)
 CORS(app)
 
+TOTAL_VOOS = int(os.environ.get("VOOS_TOTAL_VOOS", "1000"))
+SEMENTE_INVENTARIO = int(os.environ.get("VOOS_SEMENTE", str(SEMENTE_PADRAO)))
+DATA_ANCORA = date.fromisoformat(os.environ["VOOS_DATA_ANCORA"]) if os.environ.get("VOOS_DATA_ANCORA") else None
+
 class VoosDatabase:
     def __init__(self):
         self.voos = self._gerar_base_voos()
 
     def _gerar_base_voos(self):
-        companhias = ["LATAM", "GOL", "Azul", "TAM", "Avianca"]
-        cidades = ["São Paulo", "Rio de Janeiro", "Brasília", "Belo Horizonte",
-                  "Salvador", "Recife", "Fortaleza", "Manaus", "Porto Alegre"]
-        aeronaves = ["Boeing 737", "Airbus A320", "Embraer E190", "Boeing 777"]
+        # Mesmo gerador (e mesma semente) do servidor gRPC, para que a
+        # comparação de desempenho seja feita sobre os mesmos voos
+        inventario = InventarioVoos(*gerar_inventario(TOTAL_VOOS, SEMENTE_INVENTARIO, DATA_ANCORA))
+        self.cidades = DicionarioCodigos(inventario.cidades, ALIASES_CIDADES)
+        self.companhias = DicionarioCodigos(inventario.companhias, ALIASES_COMPANHIAS)
+        campos = [campo.name for campo in voos_service_pb2.Voo.DESCRIPTOR.fields]
 
         voos = []
-        for i in range(1000):
-            origem = random.choice(cidades)
-            destino = random.choice([c for c in cidades if c != origem])
-
-            data_base = datetime.now() + timedelta(days=random.randint(1, 30))
-            horario_partida = data_base.replace(
-                hour=random.randint(6, 22),
-                minute=random.choice([0, 15, 30, 45])
-            )
-            duracao = random.randint(60, 480)
-            horario_chegada = horario_partida + timedelta(minutes=duracao)
-
-            voo = {
-                "id": f"V{i+1:04d}",
-                "origem": origem,
-                "destino": destino,
-                "data": data_base.strftime("%Y-%m-%d"),
-                "horario_partida": horario_partida.strftime("%H:%M"),
-                "horario_chegada": horario_chegada.strftime("%H:%M"),
-                "preco": round(random.uniform(150.0, 1500.0), 2),
-                "companhia_aerea": random.choice(companhias),
-                "numero_voo": f"{random.choice(['LA', 'G3', 'AD', 'JJ'])}{random.randint(1000, 9999)}",
-                "assentos_disponiveis": random.randint(0, 180),
-                "status": random.choice(["ativo", "ativo", "ativo", "cancelado", "lotado"]),
-                "classe_economica": "Econômica",
-                "aeronave": random.choice(aeronaves),
-                "duracao_minutos": duracao
-            }
-            voos.append(voo)
+        for linha in range(len(inventario)):
+            voo = inventario.voo(linha)
+            voos.append({campo: getattr(voo, campo) for campo in campos})
 
         return voos
 
-    def buscar_voos(self, filtros):
+    def buscar_voos(self, filtros, campos=None):
         inicio = time.time()
         time.sleep(random.uniform(1, 3))  # Simula processamento
 
         voos_filtrados = self.voos.copy()
 
+        # Nomes, grafias sem acento e códigos IATA são resolvidos uma vez
+        # para o nome canônico; um valor desconhecido não casa com nenhum voo
         if filtros.get('origem'):
-            voos_filtrados = [v for v in voos_filtrados
-                            if v['origem'].lower() == filtros['origem'].lower()]
+            origem = self.cidades.nome(filtros['origem'])
+            voos_filtrados = [v for v in voos_filtrados if v['origem'] == origem]
 
         if filtros.get('destino'):
-            voos_filtrados = [v for v in voos_filtrados
-                            if v['destino'].lower() == filtros['destino'].lower()]
+            destino = self.cidades.nome(filtros['destino'])
+            voos_filtrados = [v for v in voos_filtrados if v['destino'] == destino]
 
         if filtros.get('data'):
             voos_filtrados = [v for v in voos_filtrados if v['data'] == filtros['data']]
+        else:
+            # Datas ISO (YYYY-MM-DD) comparam corretamente como texto
+            if filtros.get('data_inicio'):
+                voos_filtrados = [v for v in voos_filtrados if v['data'] >= filtros['data_inicio']]
+            if filtros.get('data_fim'):
+                voos_filtrados = [v for v in voos_filtrados if v['data'] <= filtros['data_fim']]
 
         if filtros.get('preco_max', 0) > 0:
             voos_filtrados = [v for v in voos_filtrados
                             if v['preco'] <= filtros['preco_max']]
 
         if filtros.get('companhia_aerea'):
-            voos_filtrados = [v for v in voos_filtrados
-                            if v['companhia_aerea'].lower() == filtros['companhia_aerea'].lower()]
+            companhia = self.companhias.nome(filtros['companhia_aerea'])
+            voos_filtrados = [v for v in voos_filtrados if v['companhia_aerea'] == companhia]
 
         if filtros.get('faixa_horario'):
             voos_filtrados = self._filtrar_por_horario(voos_filtrados, filtros['faixa_horario'])
@@ -87,10 +81,14 @@ class VoosDatabase:
         if criterio == 'preco':
             voos_filtrados.sort(key=lambda v: v['preco'])
         elif criterio == 'horario':
-            voos_filtrados.sort(key=lambda v: v['horario_partida'])
+            voos_filtrados.sort(key=lambda v: v['partida_minutos'])
         elif criterio == 'duracao':
             voos_filtrados.sort(key=lambda v: v['duracao_minutos'])
 
+        # Projeção: só os campos pedidos de cada voo
+        if campos:
+            voos_filtrados = [{campo: v[campo] for campo in campos} for v in voos_filtrados]
+
         tempo_processamento = time.time() - inicio
 
         return {
@@ -100,20 +98,43 @@ class VoosDatabase:
         }
 
     def _filtrar_por_horario(self, voos, faixa):
-        if faixa == "manha":
-            return [v for v in voos if "06:00" <= v['horario_partida'] < "12:00"]
-        elif faixa == "tarde":
-            return [v for v in voos if "12:00" <= v['horario_partida'] < "18:00"]
-        elif faixa == "noite":
-            return [v for v in voos if "18:00" <= v['horario_partida'] <= "23:59"]
-        return voos
+        if faixa not in FAIXAS_HORARIO:
+            return voos
+        inicio, fim = FAIXAS_HORARIO[faixa]
+        return [v for v in voos if inicio <= v['partida_minutos'] < fim]
+
+def campos_pedidos(valor):
+    # `campos` como lista de nomes ou na forma JSON de uma FieldMask, um
+    # texto com os caminhos em lowerCamelCase separados por vírgula
+    # ("id,preco,horarioPartida"); os nomes do proto (horario_partida) também
+    # são aceitos. Ausente ou vazio = todos os campos.
+    if valor is None:
+        return None
+    if isinstance(valor, str):
+        pedidos = [campo.strip() for campo in valor.split(",") if campo.strip()]
+    elif isinstance(valor, list) and all(isinstance(campo, str) for campo in valor):
+        pedidos = valor
+    else:
+        raise ValueError("campos deve ser uma lista de nomes ou um texto separado por vírgulas")
+    if not pedidos:
+        return None
+
+    campos = {re.sub(r"[A-Z]", lambda letra: "_" + letra.group().lower(), campo): campo for campo in pedidos}
+    desconhecidos = sorted(campos[campo] for campo in set(campos).difference(CAMPOS_VOO))
+    if desconhecidos:
+        raise ValueError(f"campos inexistentes em Voo: {', '.join(desconhecidos)}")
+    return [campo for campo in CAMPOS_VOO if campo in campos]
 
 db = VoosDatabase()
 
 @app.route('/voos/search', methods=['POST'])
 def buscar_voos():
     filtros = request.json or {}
-    resultado = db.buscar_voos(filtros)
+    try:
+        campos = campos_pedidos(filtros.get('campos'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    resultado = db.buscar_voos(filtros, campos)
     return jsonify(resultado)
 
 @app.route('/health', methods=['GET'])
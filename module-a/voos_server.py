@@ -2,11 +2,27 @@ import grpc
 from concurrent import futures
 import time
 import random
-from datetime import datetime, timedelta
+import math
+import base64
+import os
+import zlib
+from datetime import date, datetime
 import voos_service_pb2
 import voos_service_pb2_grpc
+import voos_service_v2_pb2
+import voos_service_v2_pb2_grpc
 from prometheus_client import start_http_server, Counter, Histogram, Gauge
+from prometheus_client import CollectorRegistry, multiprocess
+import multiprocessing
 import threading
+from internal.inventario import FAIXAS_PRECO_MAX, InventarioVoos, MascaraCamposInvalida, enquadrar
+from internal.memoria_compartilhada import SegmentoInventario
+from internal.gerador import gerar_inventario, SEMENTE_PADRAO
+from internal.snapshot import SnapshotInvalido, carregar_snapshot, salvar_snapshot
+from internal.cache import CacheConsultas, chave_consulta
+from internal.reservas import ReservasAssentos, ReservaInvalida, TravasVoos, VooNaoEncontrado
+from internal.itinerarios import BuscaItinerarios, ConsultaItinerariosInvalida
+from internal.voos_v2 import SerializadorV2
 
 # Métricas Prometheus
 GRPC_REQUESTS_TOTAL = Counter(
@@ -28,100 +44,116 @@ VOOS_BUSCA_TOTAL = Counter(
 
 VOOS_ENCONTRADOS = Gauge(
     'voos_encontrados_ultima_busca',
-    'Quantidade de voos encontrados na última busca'
+    'Quantidade de voos encontrados na última busca',
+    multiprocess_mode='mostrecent'
 )
 
-class VoosServiceImpl(voos_service_pb2_grpc.VoosServiceServicer):
-    def __init__(self):
-        self.voos_database = self._gerar_base_voos()
-    
-    def _gerar_base_voos(self):
-        companhias = ["LATAM", "GOL", "Azul", "TAM", "Avianca"]
-        cidades = ["São Paulo", "Rio de Janeiro", "Brasília", "Belo Horizonte",
-                  "Salvador", "Recife", "Fortaleza", "Manaus", "Porto Alegre"]
-        aeronaves = ["Boeing 737", "Airbus A320", "Embraer E190", "Boeing 777"]
-        classes = ["Econômica", "Executiva", "Primeira Classe"]
-
-        voos = []
-
-        for dia in range(10):
-            for _ in range(random.randint(3, 5)):
-                origem = random.choice(cidades)
-                destino = random.choice([c for c in cidades if c != origem])
-
-                data_base = datetime.now() + timedelta(days=dia)
-                horario_partida = data_base.replace(
-                    hour=random.randint(6, 22),
-                    minute=random.choice([0, 15, 30, 45]),
-                    second=0,
-                    microsecond=0
-                )
-                duracao = random.randint(60, 480)
-                horario_chegada = horario_partida + timedelta(minutes=duracao)
-
-                classe = random.choice(classes)
-
-                preco_base = random.uniform(150.0, 800.0)
-                multiplicador = {"Econômica": 1.0, "Executiva": 2.5, "Primeira Classe": 4.0}
-                preco = round(preco_base * multiplicador[classe], 2)
-
-                voo = voos_service_pb2.Voo(
-                    id=f"V{len(voos)+1:04d}",
-                    origem=origem,
-                    destino=destino,
-                    data=data_base.strftime("%Y-%m-%d"),
-                    horario_partida=horario_partida.strftime("%H:%M"),
-                    horario_chegada=horario_chegada.strftime("%H:%M"),
-                    preco=preco,
-                    companhia_aerea=random.choice(companhias),
-                    numero_voo=f"{random.choice(['LA', 'G3', 'AD', 'JJ'])}{random.randint(1000, 9999)}",
-                    assentos_disponiveis=random.randint(5, 180), 
-                    status="ativo", 
-                    classe_economica=classe,
-                    aeronave=random.choice(aeronaves),
-                    duracao_minutos=duracao
-                )
-                voos.append(voo)
-
-        while len(voos) < 1000:
-            origem = random.choice(cidades)
-            destino = random.choice([c for c in cidades if c != origem])
-
-            data_base = datetime.now() + timedelta(days=random.randint(11, 60))
-            horario_partida = data_base.replace(
-                hour=random.randint(6, 22),
-                minute=random.choice([0, 15, 30, 45]),
-                second=0,
-                microsecond=0
-            )
-            duracao = random.randint(60, 480)
-            horario_chegada = horario_partida + timedelta(minutes=duracao)
-
-            classe = random.choice(classes)
-            preco_base = random.uniform(150.0, 800.0)
-            multiplicador = {"Econômica": 1.0, "Executiva": 2.5, "Primeira Classe": 4.0}
-            preco = round(preco_base * multiplicador[classe], 2)
-
-            voo = voos_service_pb2.Voo(
-                id=f"V{len(voos)+1:04d}",
-                origem=origem,
-                destino=destino,
-                data=data_base.strftime("%Y-%m-%d"),
-                horario_partida=horario_partida.strftime("%H:%M"),
-                horario_chegada=horario_chegada.strftime("%H:%M"),
-                preco=preco,
-                companhia_aerea=random.choice(companhias),
-                numero_voo=f"{random.choice(['LA', 'G3', 'AD', 'JJ'])}{random.randint(1000, 9999)}",
-                assentos_disponiveis=random.randint(0, 180),
-                status=random.choice(["ativo", "ativo", "ativo", "cancelado", "lotado"]),
-                classe_economica=classe,
-                aeronave=random.choice(aeronaves),
-                duracao_minutos=duracao
-            )
-            voos.append(voo)
+CACHE_HITS_TOTAL = Counter(
+    'voos_cache_hits_total',
+    'Consultas de voos respondidas pelo cache'
+)
+
+CACHE_MISSES_TOTAL = Counter(
+    'voos_cache_misses_total',
+    'Consultas de voos que não estavam no cache'
+)
+
+CACHE_EVICTIONS_TOTAL = Counter(
+    'voos_cache_evictions_total',
+    'Entradas removidas do cache por limite de tamanho'
+)
+
+RESERVAS_TOTAL = Counter(
+    'voos_reservas_total',
+    'Reservas de assentos processadas',
+    ['resultado']
+)
+
+ASSENTOS_RESERVADOS_TOTAL = Counter(
+    'voos_assentos_reservados_total',
+    'Total de assentos reservados'
+)
+
+def _assinatura_consulta(request):
+    # Identifica os filtros de uma consulta, ignorando os campos de paginação,
+    # para que um page_token só seja aceito na mesma consulta que o gerou
+    consulta = voos_service_pb2.ConsultaVoosRequest()
+    consulta.CopyFrom(request)
+    consulta.ClearField("page_size")
+    consulta.ClearField("page_token")
+    # Facetas e máscara de campos não mudam os resultados: o token continua
+    # valendo se a página seguinte mudar esses campos
+    consulta.ClearField("incluir_facetas")
+    consulta.ClearField("largura_faixa_preco")
+    consulta.ClearField("campos")
+    return zlib.crc32(consulta.SerializeToString(deterministic=True))
+
+def _codificar_token(cursor, total, assinatura):
+    # Cursor (chave de ordenação, linha) do último voo entregue; repr da
+    # chave volta ao mesmo float em _decodificar_token
+    chave, linha = cursor
+    texto = f"{float(chave)!r}:{linha}:{total}:{assinatura}"
+    return base64.urlsafe_b64encode(texto.encode()).decode()
+
+def _decodificar_token(token, assinatura):
+    try:
+        chave, linha, total, assinatura_token = base64.urlsafe_b64decode(token.encode()).decode().split(":")
+        chave, linha, total, assinatura_token = float(chave), int(linha), int(total), int(assinatura_token)
+    except ValueError:
+        return None
+    if assinatura_token != assinatura or linha < 0 or not math.isfinite(chave):
+        return None
+    return (chave, linha), total
+
+class PageTokenInvalido(ValueError):
+    pass
+
+class LoteInvalido(ValueError):
+    pass
+
+# Palavras que fazem o ChatSuporte responder
+PALAVRAS_VOO = ["voo", "voos", "voar", "aereo", "aéreo", "aviao", "avião", "passagem", "passagens"]
+PALAVRAS_PACOTE = ["pacote", "pacotes", "combo"]
+
+# Quantidade de voos por mensagem em ConsultarVoosStream quando page_size = 0
+TAMANHO_LOTE_PADRAO = 100
+
+# Cache de respostas de ConsultarVoos (0 entradas desliga o cache)
+CACHE_MAX_ITENS = int(os.environ.get("VOOS_CACHE_MAX_ITENS", "1024"))
+CACHE_TTL_SEGUNDOS = float(os.environ.get("VOOS_CACHE_TTL_SEGUNDOS", "30"))
+
+# ConsultarVoosLote: consultas aceitas por chamada e threads que avaliam as
+# rotas do lote em paralelo
+LOTE_MAX_CONSULTAS = int(os.environ.get("VOOS_LOTE_MAX_CONSULTAS", "100"))
+LOTE_THREADS = int(os.environ.get("VOOS_LOTE_THREADS", "4"))
+
+# Largura das faixas de preço nas facetas quando a requisição não informa
+LARGURA_FAIXA_PRECO_PADRAO = 250.0
+
+# Dias do CalendarioPrecos quando a requisição não informa
+DIAS_CALENDARIO_PADRAO = 60
+
+# Inventário gerado na inicialização: mesma semente e mesma âncora geram os
+# mesmos voos em todas as réplicas (âncora padrão: data de hoje)
+TOTAL_VOOS = int(os.environ.get("VOOS_TOTAL_VOOS", "1000"))
+SEMENTE_INVENTARIO = int(os.environ.get("VOOS_SEMENTE", str(SEMENTE_PADRAO)))
+DATA_ANCORA = date.fromisoformat(os.environ["VOOS_DATA_ANCORA"]) if os.environ.get("VOOS_DATA_ANCORA") else None
+
+# Snapshot binário do inventário (colunas + índice): se o arquivo existir o
+# servidor parte dele em vez de gerar e indexar; se não existir, é gravado
+# depois da geração para acelerar a próxima inicialização
+CAMINHO_SNAPSHOT = os.environ.get("VOOS_SNAPSHOT", "")
+VERIFICAR_SNAPSHOT = os.environ.get("VOOS_SNAPSHOT_VERIFICAR", "1") != "0"
+
+class ConsultaVoosComCache:
+    # ConsultarVoos comum a voos.VoosService e voos.v2.VoosService: cache de
+    # respostas, métricas e erros. Cada versão define o rótulo das métricas
+    # (METODO), o tipo da resposta (RESPOSTA), o inventário consultado
+    # (_inventario_consultado) e como a consulta vira voos serializados
+    # (_consultar).
+    METODO = 'ConsultarVoos'
+    RESPOSTA = voos_service_pb2.ConsultaVoosResponse
 
-        return voos
-    
     def ConsultarVoos(self, request, context):
         inicio_processamento = time.time()
         
@@ -129,82 +161,477 @@ class VoosServiceImpl(voos_service_pb2_grpc.VoosServiceServicer):
         VOOS_BUSCA_TOTAL.inc()
         
         try:
-            time.sleep(random.uniform(1, 3))
-            
-            voos_filtrados = self._aplicar_filtros(request)
-            
-            voos_ordenados = self._ordenar_voos(voos_filtrados, request.ordenacao)
-            
-            tempo_processamento = time.time() - inicio_processamento
-            
-            # Métricas: registrar quantidade de voos encontrados
-            VOOS_ENCONTRADOS.set(len(voos_ordenados))
-            
-            # Métricas: registrar sucesso
-            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoos', status='success').inc()
-            GRPC_REQUEST_DURATION.labels(method='ConsultarVoos').observe(tempo_processamento)
-            
-            return voos_service_pb2.ConsultaVoosResponse(
-                voos=voos_ordenados,
-                total_encontrados=len(voos_ordenados),
-                tempo_processamento=f"{tempo_processamento:.2f}s"
-            )
+            chave, versao, resultado = self._obter_do_cache(request)
+            if resultado is None:
+                time.sleep(random.uniform(1, 3))
+                resultado = self._consultar(request)
+                self._guardar_no_cache(chave, versao, resultado)
+
+            return self._montar_resposta(resultado, inicio_processamento)
+        except (PageTokenInvalido, MascaraCamposInvalida) as e:
+            GRPC_REQUESTS_TOTAL.labels(method=self.METODO, status='error').inc()
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
         except Exception as e:
             # Métricas: registrar erro
-            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoos', status='error').inc()
+            GRPC_REQUESTS_TOTAL.labels(method=self.METODO, status='error').inc()
             raise
-    
-    def _aplicar_filtros(self, request):
-        voos_filtrados = self.voos_database.copy()
-        
-        if request.origem:
-            voos_filtrados = [v for v in voos_filtrados if v.origem.lower() == request.origem.lower()]
-        
-        if request.destino:
-            voos_filtrados = [v for v in voos_filtrados if v.destino.lower() == request.destino.lower()]
-        
-        if request.data:
-            voos_filtrados = [v for v in voos_filtrados if v.data == request.data]
 
-        if request.preco_max > 0:
-            voos_filtrados = [v for v in voos_filtrados if v.preco <= request.preco_max]
+    def _obter_do_cache(self, request):
+        chave = chave_consulta(request)
+        versao = self._inventario_consultado().versao
+        resultado = self.cache.obter(chave, versao)
 
-        if request.companhia_aerea:
-            voos_filtrados = [v for v in voos_filtrados 
-                            if v.companhia_aerea.lower() == request.companhia_aerea.lower()]
+        if resultado is not None:
+            CACHE_HITS_TOTAL.inc()
+        else:
+            CACHE_MISSES_TOTAL.inc()
+        return chave, versao, resultado
 
-        if request.faixa_horario:
-            voos_filtrados = self._filtrar_por_horario(voos_filtrados, request.faixa_horario)
+    def _guardar_no_cache(self, chave, versao, resultado):
+        CACHE_EVICTIONS_TOTAL.inc(self.cache.guardar(chave, versao, resultado))
 
-        voos_filtrados = [v for v in voos_filtrados 
-                         if v.status == "ativo" and v.assentos_disponiveis > 0]
+    def _montar_resposta(self, resultado, inicio_processamento):
+        tempo_processamento = time.time() - inicio_processamento
         
-        return voos_filtrados
-    
-    def _filtrar_por_horario(self, voos, faixa_horario):
-        if faixa_horario == "manha":
-            return [v for v in voos if "06:00" <= v.horario_partida < "12:00"]
-        elif faixa_horario == "tarde":
-            return [v for v in voos if "12:00" <= v.horario_partida < "18:00"]
-        elif faixa_horario == "noite":
-            return [v for v in voos if "18:00" <= v.horario_partida <= "23:59"]
-        return voos
+        # Métricas: registrar quantidade de voos encontrados
+        VOOS_ENCONTRADOS.set(resultado[1])
+        
+        # Métricas: registrar sucesso
+        GRPC_REQUESTS_TOTAL.labels(method=self.METODO, status='success').inc()
+        GRPC_REQUEST_DURATION.labels(method=self.METODO).observe(tempo_processamento)
+        
+        return self._serializar_resposta(resultado, f"{tempo_processamento:.2f}s")
+
+    def _serializar_resposta(self, resultado, tempo_processamento):
+        voos_serializados, total, proximo_token, facetas = resultado
+
+        # Os voos e as facetas já estão serializados; só os campos escalares
+        # são codificados aqui e anexados (a ordem dos campos não importa)
+        return voos_serializados + facetas + self.RESPOSTA(
+            total_encontrados=total,
+            tempo_processamento=tempo_processamento,
+            next_page_token=proximo_token
+        ).SerializeToString()
+
+class VoosServiceImpl(ConsultaVoosComCache, voos_service_pb2_grpc.VoosServiceServicer):
+    def __init__(self, inventario=None, travas=None):
+        if inventario is None:
+            inventario = self._carregar_base_voos()
+        self.inventario = inventario
+        self.cache = CacheConsultas(CACHE_MAX_ITENS, CACHE_TTL_SEGUNDOS)
+        self.reservas = ReservasAssentos(inventario, travas)
+        self.itinerarios = BuscaItinerarios(inventario)
+        self.pool_lote = futures.ThreadPoolExecutor(max_workers=LOTE_THREADS, thread_name_prefix="lote")
+        self._tarifas_serializadas = {}
+
+    def substituir_inventario(self, inventario):
+        # Respostas calculadas sobre o inventário anterior deixam de valer
+        self.inventario = inventario
+        self.reservas = ReservasAssentos(inventario, self.reservas.travas)
+        self.itinerarios = BuscaItinerarios(inventario)
+        self._tarifas_serializadas = {}
+        self.cache.limpar()
     
-    def _ordenar_voos(self, voos, criterio_ordenacao):
-        if criterio_ordenacao == "preco":
-            return sorted(voos, key=lambda v: v.preco)
-        elif criterio_ordenacao == "horario":
-            return sorted(voos, key=lambda v: v.horario_partida)
-        elif criterio_ordenacao == "duracao":
-            return sorted(voos, key=lambda v: v.duracao_minutos)
+    @staticmethod
+    def _gerar_base_voos():
+        inicio = time.time()
+        colunas, dicionarios, data_base = gerar_inventario(TOTAL_VOOS, SEMENTE_INVENTARIO, DATA_ANCORA)
+        print(f"📦 Inventário com {TOTAL_VOOS} voos gerado em {time.time() - inicio:.2f}s (semente {SEMENTE_INVENTARIO}, âncora {data_base})")
+        return colunas, dicionarios, data_base
+
+    @staticmethod
+    def _parametros_geracao():
+        # O que determina os voos gerados; gravado no snapshot para que um
+        # arquivo de outra configuração (ou de outro dia, sem âncora fixa)
+        # não seja carregado no lugar do inventário pedido
+        return {
+            "total_voos": TOTAL_VOOS,
+            "semente": SEMENTE_INVENTARIO,
+            "data_ancora": (DATA_ANCORA or date.today()).isoformat(),
+        }
+
+    @staticmethod
+    def _ler_snapshot():
+        # Inventário do snapshot configurado, ou None se não houver um válido
+        # e gerado com os parâmetros atuais
+        if not CAMINHO_SNAPSHOT or not os.path.exists(CAMINHO_SNAPSHOT):
+            return None
+
+        inicio = time.time()
+        try:
+            inventario = carregar_snapshot(CAMINHO_SNAPSHOT, VERIFICAR_SNAPSHOT, VoosServiceImpl._parametros_geracao())
+        except SnapshotInvalido as e:
+            print(f"⚠️  Snapshot ignorado: {e}")
+            return None
+
+        print(f"📦 Inventário com {len(inventario)} voos carregado de {CAMINHO_SNAPSHOT} em {(time.time() - inicio) * 1000:.1f}ms")
+        return inventario
+
+    @staticmethod
+    def _carregar_base_voos():
+        inventario = VoosServiceImpl._ler_snapshot()
+        if inventario is not None:
+            return inventario
+
+        inventario = InventarioVoos(*VoosServiceImpl._gerar_base_voos())
+        if CAMINHO_SNAPSHOT:
+            salvar_snapshot(inventario, CAMINHO_SNAPSHOT, VoosServiceImpl._parametros_geracao())
+            print(f"💾 Snapshot do inventário gravado em {CAMINHO_SNAPSHOT}")
+        return inventario
+
+    def _inventario_consultado(self):
+        return self.inventario
+
+    def _consultar(self, request, intercaladas=None):
+        campos = self.inventario.campos_da_mascara(request.campos)
+        linhas_ordenadas, total, proximo_token, facetas = self._selecionar(request, intercaladas)
+
+        # Só as linhas que passaram nos filtros viram bytes, e cada voo é
+        # serializado uma única vez por máscara de campos (cache por voo no
+        # inventário)
+        voos_serializados = self.inventario.voos_serializados(linhas_ordenadas, campos)
+        return voos_serializados, total, proximo_token, facetas
+
+    def _selecionar(self, request, intercaladas=None):
+        # Linhas da resposta (a página pedida, na ordem pedida), total,
+        # próximo token e facetas já serializadas; só falta serializar os voos
+        if request.incluir_facetas and intercaladas is None:
+            # As facetas leem a mesma partição que a busca
+            intercaladas = {}
+
+        if request.page_size > 0:
+            linhas_ordenadas, proximo_token, total = self._paginar(request, intercaladas)
         else:
-            return sorted(voos, key=lambda v: v.preco)
+            linhas_ordenadas = self._aplicar_filtros(request, intercaladas)
+            proximo_token, total = "", len(linhas_ordenadas)
+
+        facetas = self._facetas(request, intercaladas) if request.incluir_facetas else b""
+        return linhas_ordenadas, total, proximo_token, facetas
+
+    def _facetas(self, request, intercaladas):
+        # Campo `facetas` de ConsultaVoosResponse já serializado
+        largura = request.largura_faixa_preco if request.largura_faixa_preco > 0 else LARGURA_FAIXA_PRECO_PADRAO
+        contagens = self.inventario.facetas(request, largura, intercaladas)
+        facetas = voos_service_pb2.Facetas()
+        if contagens is not None:
+            for campo in ("companhia_aerea", "faixa_horario", "classe_economica"):
+                getattr(facetas, campo).extend(
+                    voos_service_pb2.ContagemFaceta(valor=valor, quantidade=quantidade)
+                    for valor, quantidade in contagens[campo]
+                )
+            ultima = (FAIXAS_PRECO_MAX - 1) * largura
+            facetas.faixas_preco.extend(
+                voos_service_pb2.FaixaPreco(
+                    preco_min=inicio,
+                    preco_max=inicio + largura if inicio < ultima else 0,
+                    quantidade=quantidade
+                )
+                for inicio, quantidade in contagens["preco"]
+            )
+        return voos_service_pb2.ConsultaVoosResponse(facetas=facetas).SerializeToString()
+
+    def ConsultarVoosStream(self, request, context):
+        inicio_processamento = time.time()
+
+        # Métricas: incrementar contador de buscas
+        VOOS_BUSCA_TOTAL.inc()
+
+        try:
+            time.sleep(random.uniform(1, 3))
+
+            total = 0
+            for quantidade, lote in self._lotes_consulta(request):
+                total += quantidade
+                yield lote
+
+            self._registrar_stream(total, inicio_processamento)
+        except MascaraCamposInvalida as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosStream', status='error').inc()
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosStream', status='error').inc()
+            raise
+
+    def _lotes_consulta(self, request):
+        # Cada lote é montado e enviado assim que fica pronto; só os
+        # bytes do lote atual ficam em memória. LoteVoos tem apenas o
+        # campo `voos`, então o lote é a concatenação dos voos serializados
+        tamanho_lote = request.page_size if request.page_size > 0 else TAMANHO_LOTE_PADRAO
+        campos = self.inventario.campos_da_mascara(request.campos)
+        for linhas in self.inventario.iterar_lotes(request, tamanho_lote):
+            yield len(linhas), self.inventario.voos_serializados(linhas, campos)
+
+    def _registrar_stream(self, total, inicio_processamento):
+        tempo_processamento = time.time() - inicio_processamento
+
+        # Métricas: registrar quantidade de voos encontrados
+        VOOS_ENCONTRADOS.set(total)
+
+        # Métricas: registrar sucesso
+        GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosStream', status='success').inc()
+        GRPC_REQUEST_DURATION.labels(method='ConsultarVoosStream').observe(tempo_processamento)
+
+    def _aplicar_filtros(self, request, intercaladas=None):
+        # Já devolve as linhas na ordem pedida em request.ordenacao
+        return self.inventario.buscar(request, intercaladas)
+
+    def _paginar(self, request, intercaladas=None):
+        # O token guarda o cursor (chave, linha) do último voo entregue e o
+        # total da primeira página. O total só informa: pode ter ficado velho
+        # (reservas e voos lotados tiram linhas da partição entre uma página
+        # e outra), então a próxima página existe sempre que algum voo casa
+        # depois do cursor.
+        assinatura = _assinatura_consulta(request)
+        cursor, total = None, None
+        if request.page_token:
+            token = _decodificar_token(request.page_token, assinatura)
+            if token is None:
+                raise PageTokenInvalido("page_token inválido para esta consulta")
+            cursor, total = token
+
+        linhas, cursor, total, fim = self.inventario.buscar_pagina(
+            request, request.page_size, cursor, total, intercaladas
+        )
+
+        proximo_token = ""
+        if not fim:
+            proximo_token = _codificar_token(cursor, total, assinatura)
+        return linhas, proximo_token, total
+
+    def ConsultarVoosLote(self, request, context):
+        inicio_processamento = time.time()
+
+        # Métricas: incrementar contador de buscas (uma por consulta do lote)
+        VOOS_BUSCA_TOTAL.inc(len(request.consultas))
+
+        try:
+            resultados, pendentes = self._resultados_em_cache(request.consultas)
+            if pendentes:
+                # Uma única espera simulada para o lote inteiro
+                time.sleep(random.uniform(1, 3))
+                self._consultar_pendentes(resultados, pendentes)
+
+            return self._montar_resposta_lote(resultados, inicio_processamento)
+        except (PageTokenInvalido, LoteInvalido, MascaraCamposInvalida) as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosLote', status='error').inc()
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosLote', status='error').inc()
+            raise
+
+    def _resultados_em_cache(self, consultas):
+        # Resultado de cada consulta que já está no cache; as demais ficam
+        # pendentes, uma entrada por consulta distinta (chave -> (versão,
+        # consulta, posições no lote)), então repetidas são calculadas uma vez
+        if len(consultas) > LOTE_MAX_CONSULTAS:
+            raise LoteInvalido(f"no máximo {LOTE_MAX_CONSULTAS} consultas por lote")
+
+        resultados = [None] * len(consultas)
+        pendentes = {}
+        for posicao, consulta in enumerate(consultas):
+            chave, versao, resultado = self._obter_do_cache(consulta)
+            if resultado is not None:
+                resultados[posicao] = resultado
+            else:
+                pendentes.setdefault(chave, (versao, consulta, []))[2].append(posicao)
+        return resultados, pendentes
+
+    def _consultar_pendentes(self, resultados, pendentes):
+        # Grupos diferentes são independentes e rodam em paralelo no pool
+        # do lote
+        for calculados in self.pool_lote.map(self._consultar_grupo, self._grupos_pendentes(pendentes)):
+            self._guardar_calculados(resultados, calculados)
+
+    @staticmethod
+    def _grupos_pendentes(pendentes):
+        # Consultas da mesma rota (origem e destino normalizados) formam um
+        # grupo avaliado em sequência, reaproveitando as partições de
+        # intervalos de datas já intercaladas
+        grupos = {}
+        for chave, pendente in pendentes.items():
+            grupos.setdefault(chave[:2], []).append((chave, *pendente))
+        return list(grupos.values())
+
+    def _guardar_calculados(self, resultados, calculados):
+        for chave, versao, posicoes, resultado in calculados:
+            self._guardar_no_cache(chave, versao, resultado)
+            for posicao in posicoes:
+                resultados[posicao] = resultado
+
+    def _consultar_grupo(self, grupo):
+        intercaladas = {}
+        return [
+            (chave, versao, posicoes, self._consultar(consulta, intercaladas))
+            for chave, versao, consulta, posicoes in grupo
+        ]
+
+    def _montar_resposta_lote(self, resultados, inicio_processamento):
+        tempo_processamento = time.time() - inicio_processamento
+
+        # Métricas: registrar sucesso
+        GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosLote', status='success').inc()
+        GRPC_REQUEST_DURATION.labels(method='ConsultarVoosLote').observe(tempo_processamento)
+
+        # Cada resposta é montada como em ConsultarVoos e enquadrada como um
+        # elemento de `respostas`, na ordem das consultas
+        tempo_processamento = f"{tempo_processamento:.2f}s"
+        return b"".join([
+            enquadrar(self._serializar_resposta(resultado, tempo_processamento)) for resultado in resultados
+        ]) + voos_service_pb2.ConsultaVoosLoteResponse(
+            tempo_processamento=tempo_processamento
+        ).SerializeToString()
+
+    def CalendarioPrecos(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            return self._calendario_precos(request, inicio_processamento)
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='CalendarioPrecos', status='error').inc()
+            raise
+
+    def _calendario_precos(self, request, inicio_processamento):
+        # Só lê a tabela de menores tarifas do inventário, sem espera
+        # simulada: também é chamada direto no modo asyncio
+        dias = request.dias if request.dias > 0 else DIAS_CALENDARIO_PADRAO
+        calendario = self.inventario.calendario(request.origem, request.destino, request.data_inicio, dias)
+
+        tarifas = b""
+        if calendario is not None:
+            primeiro_dia, precos, linhas = calendario
+            tarifas = b"".join([
+                self._tarifa_serializada(dia, preco, linha)
+                for dia, preco, linha in zip(range(primeiro_dia, primeiro_dia + len(precos)), precos.tolist(), linhas.tolist())
+            ])
+
+        tempo_processamento = time.time() - inicio_processamento
+
+        # Métricas: registrar sucesso
+        GRPC_REQUESTS_TOTAL.labels(method='CalendarioPrecos', status='success').inc()
+        GRPC_REQUEST_DURATION.labels(method='CalendarioPrecos').observe(tempo_processamento)
+
+        return tarifas + voos_service_pb2.CalendarioPrecosResponse(
+            tempo_processamento=f"{tempo_processamento:.6f}s"
+        ).SerializeToString()
+
+    def _tarifa_serializada(self, dia, preco, linha):
+        # TarifaDia enquadrada como elemento de `dias`. Só depende do dia, do
+        # voo (-1 sem voo) e do preço, então fica em cache por (dia, voo)
+        # enquanto o preço não mudar
+        entrada = self._tarifas_serializadas.get((dia, linha))
+        if entrada is None or entrada[0] != preco:
+            tarifa = voos_service_pb2.TarifaDia(data=self.inventario.data(dia))
+            if linha >= 0:
+                tarifa.disponivel = True
+                tarifa.menor_preco = preco
+                tarifa.voo_id = self.inventario.id_do_voo(linha)
+            entrada = (preco, enquadrar(tarifa.SerializeToString()))
+            self._tarifas_serializadas[(dia, linha)] = entrada
+        return entrada[1]
+
+    def ReservarAssentos(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            _, reservas = self._reservar('ReservarAssentos', [request], inicio_processamento)
+            return reservas[0]
+        except (ReservaInvalida, VooNaoEncontrado) as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentos', status='error').inc()
+            context.abort(status_erro_reserva(e), str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentos', status='error').inc()
+            raise
+
+    def ReservarAssentosLote(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            sucesso, reservas = self._reservar('ReservarAssentosLote', request.reservas, inicio_processamento)
+            return voos_service_pb2.ReservaAssentosLoteResponse(sucesso=sucesso, reservas=reservas)
+        except (ReservaInvalida, VooNaoEncontrado) as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentosLote', status='error').inc()
+            context.abort(status_erro_reserva(e), str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentosLote', status='error').inc()
+            raise
+
+    def _reservar(self, metodo, pedidos, inicio_processamento):
+        # A reserva só segura as travas das listras dos voos envolvidos, e
+        # por pouco tempo; por isso também é chamada direto no modo asyncio
+        sucesso, reservas = self.reservas.reservar([(p.voo_id, p.quantidade) for p in pedidos])
+
+        # Métricas: registrar resultado da reserva
+        RESERVAS_TOTAL.labels(resultado='confirmada' if sucesso else 'recusada').inc()
+        if sucesso:
+            ASSENTOS_RESERVADOS_TOTAL.inc(sum(p.quantidade for p in pedidos))
+
+        GRPC_REQUESTS_TOTAL.labels(method=metodo, status='success').inc()
+        GRPC_REQUEST_DURATION.labels(method=metodo).observe(time.time() - inicio_processamento)
+
+        return sucesso, [
+            voos_service_pb2.ReservaAssentosResponse(
+                sucesso=reserva.sucesso,
+                voo_id=reserva.voo_id,
+                assentos_disponiveis=reserva.assentos_disponiveis,
+                status=reserva.status,
+                mensagem=reserva.mensagem
+            )
+            for reserva in reservas
+        ]
+
+    def ConsultarItinerarios(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            return self._consultar_itinerarios(request, inicio_processamento)
+        except ConsultaItinerariosInvalida as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarItinerarios', status='error').inc()
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarItinerarios', status='error').inc()
+            raise
+
+    def _consultar_itinerarios(self, request, inicio_processamento):
+        # Busca só em memória, sem espera simulada: também é chamada direto
+        # no modo asyncio
+        itinerarios = self.itinerarios.buscar(request)
+
+        tempo_processamento = time.time() - inicio_processamento
+
+        # Métricas: registrar sucesso
+        GRPC_REQUESTS_TOTAL.labels(method='ConsultarItinerarios', status='success').inc()
+        GRPC_REQUEST_DURATION.labels(method='ConsultarItinerarios').observe(tempo_processamento)
+
+        return voos_service_pb2.ConsultaItinerariosResponse(
+            itinerarios=[
+                voos_service_pb2.Itinerario(
+                    voos=self.inventario.voos(itinerario.linhas),
+                    preco_total=round(itinerario.preco, 2),
+                    duracao_total_minutos=itinerario.duracao_minutos,
+                    conexoes=len(itinerario.linhas) - 1
+                )
+                for itinerario in itinerarios
+            ],
+            tempo_processamento=f"{tempo_processamento:.2f}s"
+        )
 
     def MonitorarVoo(self, request, context):
         numero_voo = request.numero_voo
         print(f"[MONITORAR VOO] Iniciando monitoramento do voo {numero_voo}")
 
-        status_timeline = [
+        for update in self._timeline_monitoramento(numero_voo):
+            time.sleep(2)  
+
+            yield self._status_update(numero_voo, update)
+
+    def _timeline_monitoramento(self, numero_voo):
+        return [
             {"status": "aguardando_embarque", "mensagem": f"Voo {numero_voo} aguardando no portão de embarque", "progresso": 10},
             {"status": "embarcando", "mensagem": f"Embarque do voo {numero_voo} iniciado", "progresso": 30},
             {"status": "pronto_decolagem", "mensagem": f"Voo {numero_voo} pronto para decolagem", "progresso": 50},
@@ -214,73 +641,231 @@ class VoosServiceImpl(voos_service_pb2_grpc.VoosServiceServicer):
             {"status": "finalizado", "mensagem": f"Voo {numero_voo} finalizado - passageiros desembarcando", "progresso": 100}
         ]
 
-        for update in status_timeline:
-            time.sleep(2)  
+    def _status_update(self, numero_voo, update):
+        print(f"[MONITORAR VOO] {update['mensagem']} ({update['progresso']}%)")
 
-            yield voos_service_pb2.StatusVooUpdate(
-                numero_voo=numero_voo,
-                status=update["status"],
-                mensagem=update["mensagem"],
-                timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                progresso_percentual=update["progresso"]
-            )
-
-            print(f"[MONITORAR VOO] {update['mensagem']} ({update['progresso']}%)")
+        return voos_service_pb2.StatusVooUpdate(
+            numero_voo=numero_voo,
+            status=update["status"],
+            mensagem=update["mensagem"],
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            progresso_percentual=update["progresso"]
+        )
 
     def ChatSuporte(self, request_iterator, context):
         print("[CHAT SUPORTE VOOS] Chat iniciado")
 
         for mensagem_cliente in request_iterator:
-            print(f"[CHAT VOOS] Recebido: {mensagem_cliente.mensagem}")
-
-            palavras_voo = ["voo", "voos", "voar", "aereo", "aéreo", "aviao", "avião", "passagem", "passagens"]
-            palavras_pacote = ["pacote", "pacotes", "combo"]
-            mensagem_lower = mensagem_cliente.mensagem.lower()
-
-            if any(palavra in mensagem_lower for palavra in palavras_voo) or any(palavra in mensagem_lower for palavra in palavras_pacote):
+            if self._mensagem_sobre_voos(mensagem_cliente):
                 time.sleep(0.5)  
 
-                if any(palavra in mensagem_lower for palavra in palavras_pacote):
-                    resposta = "✈️ VOOS - Nossos pacotes incluem passagens aéreas com LATAM, GOL, Azul e mais! Voos a partir de R$ 150."
-                elif "preco" in mensagem_lower or "preço" in mensagem_lower or "barato" in mensagem_lower:
-                    resposta = "📊 Temos voos a partir de R$ 150! Use os filtros de preço para encontrar as melhores ofertas."
-                elif "horario" in mensagem_lower or "horário" in mensagem_lower:
-                    resposta = "🕐 Oferecemos voos em diversos horários: manhã (6h-12h), tarde (12h-18h) e noite (18h-0h)."
-                elif "companhia" in mensagem_lower:
-                    resposta = "✈️ Trabalhamos com LATAM, GOL, Azul, TAM e Avianca. Você tem preferência?"
-                elif "classe" in mensagem_lower:
-                    resposta = "🎫 Temos 3 classes disponíveis: Econômica, Executiva e Primeira Classe."
-                elif "monitorar" in mensagem_lower:
-                    resposta = "📡 Use o botão 'Monitorar Voo' no canto inferior direito para acompanhar seu voo em tempo real!"
-                else:
-                    resposta = f"✈️ Olá! Como posso ajudar com informações sobre voos? Temos diversas opções disponíveis."
-
-                yield voos_service_pb2.ChatMessage(
-                    usuario="suporte",
-                    mensagem=resposta,
-                    timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    contexto="voo"
-                )
-
-                print(f"[CHAT VOOS] Respondido: {resposta}")
-            else:
-                print(f"[CHAT VOOS] Mensagem não é sobre voos, ignorando...")
-
-def serve():
-    # Iniciar servidor HTTP para métricas Prometheus na porta 8000
-    start_http_server(8000)
+                yield self._responder_chat(mensagem_cliente)
+
+    def _mensagem_sobre_voos(self, mensagem_cliente):
+        print(f"[CHAT VOOS] Recebido: {mensagem_cliente.mensagem}")
+
+        mensagem_lower = mensagem_cliente.mensagem.lower()
+        if any(palavra in mensagem_lower for palavra in PALAVRAS_VOO) or any(palavra in mensagem_lower for palavra in PALAVRAS_PACOTE):
+            return True
+
+        print(f"[CHAT VOOS] Mensagem não é sobre voos, ignorando...")
+        return False
+
+    def _responder_chat(self, mensagem_cliente):
+        mensagem_lower = mensagem_cliente.mensagem.lower()
+
+        if any(palavra in mensagem_lower for palavra in PALAVRAS_PACOTE):
+            resposta = "✈️ VOOS - Nossos pacotes incluem passagens aéreas com LATAM, GOL, Azul e mais! Voos a partir de R$ 150."
+        elif "preco" in mensagem_lower or "preço" in mensagem_lower or "barato" in mensagem_lower:
+            resposta = "📊 Temos voos a partir de R$ 150! Use os filtros de preço para encontrar as melhores ofertas."
+        elif "horario" in mensagem_lower or "horário" in mensagem_lower:
+            resposta = "🕐 Oferecemos voos em diversos horários: manhã (6h-12h), tarde (12h-18h) e noite (18h-0h)."
+        elif "companhia" in mensagem_lower:
+            resposta = "✈️ Trabalhamos com LATAM, GOL, Azul, TAM e Avianca. Você tem preferência?"
+        elif "classe" in mensagem_lower:
+            resposta = "🎫 Temos 3 classes disponíveis: Econômica, Executiva e Primeira Classe."
+        elif "monitorar" in mensagem_lower:
+            resposta = "📡 Use o botão 'Monitorar Voo' no canto inferior direito para acompanhar seu voo em tempo real!"
+        else:
+            resposta = f"✈️ Olá! Como posso ajudar com informações sobre voos? Temos diversas opções disponíveis."
+
+        print(f"[CHAT VOOS] Respondido: {resposta}")
+
+        return voos_service_pb2.ChatMessage(
+            usuario="suporte",
+            mensagem=resposta,
+            timestamp=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            contexto="voo"
+        )
+
+class VoosServiceV2Impl(ConsultaVoosComCache, voos_service_v2_pb2_grpc.VoosServiceServicer):
+    # voos.v2.VoosService: a seleção (índice, filtros, paginação, facetas)
+    # é a do servicer v1, sobre o mesmo inventário; só os voos são
+    # serializados no esquema v2. O cache de respostas é separado porque
+    # guarda bytes v2.
+    METODO = 'v2.ConsultarVoos'
+    RESPOSTA = voos_service_v2_pb2.ConsultaVoosResponse
+
+    def __init__(self, servico_v1):
+        self.v1 = servico_v1
+        self.cache = CacheConsultas(CACHE_MAX_ITENS, CACHE_TTL_SEGUNDOS)
+        self._serializador = SerializadorV2(servico_v1.inventario)
+
+    @property
+    def serializador(self):
+        # Acompanha o inventário do servicer v1 (substituir_inventario)
+        if self._serializador.inventario is not self.v1.inventario:
+            self._serializador = SerializadorV2(self.v1.inventario)
+            self.cache.limpar()
+        return self._serializador
+
+    def _inventario_consultado(self):
+        return self.serializador.inventario
+
+    def _consultar(self, request):
+        linhas_ordenadas, total, proximo_token, facetas = self.v1._selecionar(request)
+        return self.serializador.voos_serializados(linhas_ordenadas), total, proximo_token, facetas
+
+def status_erro_reserva(erro):
+    if isinstance(erro, VooNaoEncontrado):
+        return grpc.StatusCode.NOT_FOUND
+    return grpc.StatusCode.INVALID_ARGUMENT
+
+def _serializador_bruto(serializar):
+    # Respostas que já chegam como bytes vão direto para o fio
+    def serializador(resposta):
+        if isinstance(resposta, bytes):
+            return resposta
+        return serializar(resposta)
+    return serializador
+
+def _com_serializador_bruto(handler):
+    if handler is None or handler.response_serializer is None:
+        return handler
+    return handler._replace(response_serializer=_serializador_bruto(handler.response_serializer))
+
+class _HandlerSerializadorBruto(grpc.GenericRpcHandler):
+    def __init__(self, handler):
+        self._handler = handler
+
+    def service(self, handler_call_details):
+        return _com_serializador_bruto(self._handler.service(handler_call_details))
+
+class _RegistroSerializadorBruto:
+    # Repassa ao servidor o registro feito pelo código gerado, trocando o
+    # serializador de resposta de cada método por _serializador_bruto
+    def __init__(self, server):
+        self._server = server
+
+    def add_generic_rpc_handlers(self, generic_rpc_handlers):
+        self._server.add_generic_rpc_handlers(
+            tuple(_HandlerSerializadorBruto(handler) for handler in generic_rpc_handlers)
+        )
+
+    def add_registered_method_handlers(self, service_name, method_handlers):
+        self._server.add_registered_method_handlers(
+            service_name,
+            {nome: _com_serializador_bruto(handler) for nome, handler in method_handlers.items()}
+        )
+
+def adicionar_servico_voos(servicer, server):
+    # Como add_VoosServiceServicer_to_server, mas aceitando respostas já
+    # serializadas (ConsultarVoos, ConsultarVoosStream, ConsultarVoosLote e
+    # CalendarioPrecos devolvem bytes)
+    voos_service_pb2_grpc.add_VoosServiceServicer_to_server(servicer, _RegistroSerializadorBruto(server))
+
+def adicionar_servico_voos_v2(servicer, server):
+    # O mesmo para voos.v2.VoosService, que também devolve bytes
+    voos_service_v2_pb2_grpc.add_VoosServiceServicer_to_server(servicer, _RegistroSerializadorBruto(server))
+
+def iniciar_metricas():
+    # Iniciar servidor HTTP para métricas Prometheus na porta 8000. Com
+    # PROMETHEUS_MULTIPROC_DIR definido (vários workers), cada processo grava
+    # suas métricas nesse diretório e o endpoint agrega todas elas.
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(8000, registry=registry)
+    else:
+        start_http_server(8000)
     print("📊 Servidor de métricas Prometheus rodando na porta 8000")
-    
-    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10))
-    voos_service_pb2_grpc.add_VoosServiceServicer_to_server(VoosServiceImpl(), server)
+
+def executar_workers(alvo, workers):
+    # Pre-fork: `workers` processos independentes, cada um com seu próprio
+    # servidor gRPC escutando na mesma porta via SO_REUSEPORT; o kernel
+    # distribui as conexões entre eles. "spawn" evita herdar estado do gRPC.
+    #
+    # O inventário é gerado uma única vez aqui e publicado em memória
+    # compartilhada; `alvo` recebe o nome do segmento e cada worker anexa as
+    # mesmas colunas sem copiar. As travas das reservas também são criadas
+    # aqui, entre processos, para que todos os workers usem as mesmas listras.
+    inventario = VoosServiceImpl._carregar_base_voos()
+    segmento = SegmentoInventario.criar(
+        inventario.colunas, inventario.dicionarios, inventario.data_base, contadores=inventario._contadores
+    )
+    del inventario
+    print(f"📦 Inventário publicado em memória compartilhada ({segmento.nome}, {segmento.shm.size} bytes)")
+
+    contexto = multiprocessing.get_context("spawn")
+    travas = TravasVoos(fabrica=contexto.Lock)
+    processos = [
+        contexto.Process(target=alvo, args=(segmento.nome, travas), name=f"voos-worker-{i + 1}")
+        for i in range(workers)
+    ]
+    for processo in processos:
+        processo.start()
+
+    try:
+        for processo in processos:
+            processo.join()
+    finally:
+        for processo in processos:
+            if processo.is_alive():
+                processo.terminate()
+                processo.join()
+            if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+                multiprocess.mark_process_dead(processo.pid)
+        segmento.fechar()
+
+def carregar_inventario(nome_segmento=None):
+    # Inventário anexado ao segmento compartilhado, ou None para gerar um local.
+    # Se houver snapshot do mesmo inventário, o worker aproveita o índice
+    # gravado nele em vez de reconstruir o seu.
+    if nome_segmento is None:
+        return None
+
+    segmento = SegmentoInventario.anexar(nome_segmento)
+    snapshot = VoosServiceImpl._ler_snapshot()
+    indice = None
+    if snapshot is not None and snapshot._aplicados.tolist() == segmento.contadores.tolist():
+        indice = snapshot.indice
+    return InventarioVoos.de_segmento(segmento, indice)
+
+def _servir(nome_segmento=None, travas=None):
+    server = grpc.server(
+        futures.ThreadPoolExecutor(max_workers=10),
+        options=[("grpc.so_reuseport", 1)]
+    )
+    servico = VoosServiceImpl(carregar_inventario(nome_segmento), travas)
+    adicionar_servico_voos(servico, server)
+    adicionar_servico_voos_v2(VoosServiceV2Impl(servico), server)
 
     server.add_insecure_port('0.0.0.0:50051')
     server.start()
 
-    print("🚀 Servidor gRPC de Voos rodando na porta 50051")
+    print(f"🚀 Servidor gRPC de Voos rodando na porta 50051 (pid {os.getpid()})")
     print("Pressione Ctrl+C para parar")
 
     server.wait_for_termination()
 
+def serve(workers=1):
+    iniciar_metricas()
+
+    if workers > 1:
+        print(f"Iniciando {workers} processos worker")
+        executar_workers(_servir, workers)
+    else:
+        _servir()
+
 if __name__ == '__main__':
     serve()
@@ -0,0 +1,209 @@
+import asyncio
+import os
+import time
+import random
+import grpc
+import voos_service_pb2
+from voos_server import (
+    VoosServiceImpl,
+    VoosServiceV2Impl,
+    PageTokenInvalido,
+    LoteInvalido,
+    MascaraCamposInvalida,
+    ReservaInvalida,
+    VooNaoEncontrado,
+    ConsultaItinerariosInvalida,
+    status_erro_reserva,
+    adicionar_servico_voos,
+    adicionar_servico_voos_v2,
+    iniciar_metricas,
+    executar_workers,
+    carregar_inventario,
+    GRPC_REQUESTS_TOTAL,
+    VOOS_BUSCA_TOTAL,
+)
+
+class ConsultaVoosAsync:
+    # ConsultarVoos de ConsultaVoosComCache (v1 e v2) sobre grpc.aio
+
+    async def ConsultarVoos(self, request, context):
+        inicio_processamento = time.time()
+
+        # Métricas: incrementar contador de buscas
+        VOOS_BUSCA_TOTAL.inc()
+
+        try:
+            chave, versao, resultado = self._obter_do_cache(request)
+            if resultado is None:
+                await asyncio.sleep(random.uniform(1, 3))
+                resultado = self._consultar(request)
+                self._guardar_no_cache(chave, versao, resultado)
+
+            return self._montar_resposta(resultado, inicio_processamento)
+        except (PageTokenInvalido, MascaraCamposInvalida) as e:
+            GRPC_REQUESTS_TOTAL.labels(method=self.METODO, status='error').inc()
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method=self.METODO, status='error').inc()
+            raise
+
+class VoosServiceAsyncImpl(ConsultaVoosAsync, VoosServiceImpl):
+    # Mesma lógica de VoosServiceImpl sobre grpc.aio: as esperas simuladas
+    # usam asyncio.sleep e não prendem uma thread por chamada, então o
+    # limite de chamadas simultâneas deixa de ser o tamanho do pool
+
+    async def ConsultarVoosStream(self, request, context):
+        inicio_processamento = time.time()
+
+        # Métricas: incrementar contador de buscas
+        VOOS_BUSCA_TOTAL.inc()
+
+        try:
+            await asyncio.sleep(random.uniform(1, 3))
+
+            total = 0
+            for quantidade, lote in self._lotes_consulta(request):
+                total += quantidade
+                yield lote
+
+            self._registrar_stream(total, inicio_processamento)
+        except MascaraCamposInvalida as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosStream', status='error').inc()
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosStream', status='error').inc()
+            raise
+
+    async def ConsultarVoosLote(self, request, context):
+        inicio_processamento = time.time()
+
+        # Métricas: incrementar contador de buscas (uma por consulta do lote)
+        VOOS_BUSCA_TOTAL.inc(len(request.consultas))
+
+        try:
+            resultados, pendentes = self._resultados_em_cache(request.consultas)
+            if pendentes:
+                # Uma única espera simulada para o lote inteiro
+                await asyncio.sleep(random.uniform(1, 3))
+                # Os grupos rodam no pool do lote: o event loop continua
+                # atendendo outras chamadas enquanto eles são avaliados
+                loop = asyncio.get_running_loop()
+                calculados = await asyncio.gather(*(
+                    loop.run_in_executor(self.pool_lote, self._consultar_grupo, grupo)
+                    for grupo in self._grupos_pendentes(pendentes)
+                ))
+                for calculado in calculados:
+                    self._guardar_calculados(resultados, calculado)
+
+            return self._montar_resposta_lote(resultados, inicio_processamento)
+        except (PageTokenInvalido, LoteInvalido, MascaraCamposInvalida) as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosLote', status='error').inc()
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarVoosLote', status='error').inc()
+            raise
+
+    async def CalendarioPrecos(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            return self._calendario_precos(request, inicio_processamento)
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='CalendarioPrecos', status='error').inc()
+            raise
+
+    async def ReservarAssentos(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            _, reservas = self._reservar('ReservarAssentos', [request], inicio_processamento)
+            return reservas[0]
+        except (ReservaInvalida, VooNaoEncontrado) as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentos', status='error').inc()
+            await context.abort(status_erro_reserva(e), str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentos', status='error').inc()
+            raise
+
+    async def ReservarAssentosLote(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            sucesso, reservas = self._reservar('ReservarAssentosLote', request.reservas, inicio_processamento)
+            return voos_service_pb2.ReservaAssentosLoteResponse(sucesso=sucesso, reservas=reservas)
+        except (ReservaInvalida, VooNaoEncontrado) as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentosLote', status='error').inc()
+            await context.abort(status_erro_reserva(e), str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ReservarAssentosLote', status='error').inc()
+            raise
+
+    async def ConsultarItinerarios(self, request, context):
+        inicio_processamento = time.time()
+
+        try:
+            return self._consultar_itinerarios(request, inicio_processamento)
+        except ConsultaItinerariosInvalida as e:
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarItinerarios', status='error').inc()
+            await context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+        except Exception as e:
+            # Métricas: registrar erro
+            GRPC_REQUESTS_TOTAL.labels(method='ConsultarItinerarios', status='error').inc()
+            raise
+
+    async def MonitorarVoo(self, request, context):
+        numero_voo = request.numero_voo
+        print(f"[MONITORAR VOO] Iniciando monitoramento do voo {numero_voo}")
+
+        for update in self._timeline_monitoramento(numero_voo):
+            await asyncio.sleep(2)
+
+            yield self._status_update(numero_voo, update)
+
+    async def ChatSuporte(self, request_iterator, context):
+        print("[CHAT SUPORTE VOOS] Chat iniciado")
+
+        async for mensagem_cliente in request_iterator:
+            if self._mensagem_sobre_voos(mensagem_cliente):
+                await asyncio.sleep(0.5)
+
+                yield self._responder_chat(mensagem_cliente)
+
+class VoosServiceV2AsyncImpl(ConsultaVoosAsync, VoosServiceV2Impl):
+    # voos.v2.VoosService sobre grpc.aio, como VoosServiceAsyncImpl
+    pass
+
+async def serve_aio(nome_segmento=None, travas=None):
+    server = grpc.aio.server(options=[("grpc.so_reuseport", 1)])
+    servico = VoosServiceAsyncImpl(carregar_inventario(nome_segmento), travas)
+    adicionar_servico_voos(servico, server)
+    adicionar_servico_voos_v2(VoosServiceV2AsyncImpl(servico), server)
+
+    server.add_insecure_port('0.0.0.0:50051')
+    await server.start()
+
+    print(f"🚀 Servidor gRPC de Voos (asyncio) rodando na porta 50051 (pid {os.getpid()})")
+    print("Pressione Ctrl+C para parar")
+
+    await server.wait_for_termination()
+
+def _servir(nome_segmento=None, travas=None):
+    asyncio.run(serve_aio(nome_segmento, travas))
+
+def serve(workers=1):
+    iniciar_metricas()
+
+    if workers > 1:
+        print(f"Iniciando {workers} processos worker")
+        executar_workers(_servir, workers)
+    else:
+        _servir()
+
+if __name__ == '__main__':
+    serve()
@@ -4,6 +4,7 @@ const path = require('path');
 
 const flightProtoPath = path.join(__dirname, '../protos/flights.proto');
 const hotelProtoPath = path.join(__dirname, '../protos/hotels.proto');
+const packageProtoPath = path.join(__dirname, '../protos/packages.proto');
 
 const flightPackageDefinition = protoLoader.loadSync(flightProtoPath, {
   keepCase: true,
@@ -21,13 +22,26 @@ const hotelPackageDefinition = protoLoader.loadSync(hotelProtoPath, {
   oneofs: true
 });
 
+// packages.proto importa flights.proto e hotels.proto do mesmo diretório
+const packagePackageDefinition = protoLoader.loadSync(packageProtoPath, {
+  keepCase: true,
+  longs: String,
+  enums: String,
+  defaults: true,
+  oneofs: true,
+  includeDirs: [path.join(__dirname, '../protos')]
+});
+
 const voosProto = grpc.loadPackageDefinition(flightPackageDefinition).voos;
 const hotelProto = grpc.loadPackageDefinition(hotelPackageDefinition).hotel;
+const pacotesProto = grpc.loadPackageDefinition(packagePackageDefinition).pacotes;
 
 const FLIGHT_SERVICE_HOST = process.env.FLIGHT_SERVICE_HOST || 'localhost';
 const FLIGHT_SERVICE_PORT = process.env.FLIGHT_SERVICE_PORT || '50051';
 const HOTEL_SERVICE_HOST = process.env.HOTEL_SERVICE_HOST || 'localhost';
 const HOTEL_SERVICE_PORT = process.env.HOTEL_SERVICE_PORT || '50052';
+const PACKAGE_SERVICE_HOST = process.env.PACKAGE_SERVICE_HOST || 'localhost';
+const PACKAGE_SERVICE_PORT = process.env.PACKAGE_SERVICE_PORT || '50053';
 
 const flightClient = new voosProto.VoosService(
   `${FLIGHT_SERVICE_HOST}:${FLIGHT_SERVICE_PORT}`,
@@ -38,8 +52,14 @@ const hotelClient = new hotelProto.HotelService(
   grpc.credentials.createInsecure()
 );
 
+const packageClient = new pacotesProto.PacotesService(
+  `${PACKAGE_SERVICE_HOST}:${PACKAGE_SERVICE_PORT}`,
+  grpc.credentials.createInsecure()
+);
+
 console.log(`Flight Service: ${FLIGHT_SERVICE_HOST}:${FLIGHT_SERVICE_PORT}`);
 console.log(`Hotel Service: ${HOTEL_SERVICE_HOST}:${HOTEL_SERVICE_PORT}`);
+console.log(`Package Service: ${PACKAGE_SERVICE_HOST}:${PACKAGE_SERVICE_PORT}`);
 
 function getFlightClient() {
   return flightClient;
@@ -49,7 +69,33 @@ function getHotelClient() {
   return hotelClient;
 }
 
+function getPackageClient() {
+  return packageClient;
+}
+
+const DIAS_FLEXIVEIS = parseInt(process.env.DIAS_FLEXIVEIS || '3', 10);
+
+// Campos de data de ConsultaVoosRequest: a data exata ou, com datas
+// flexíveis, o intervalo de ±dias em torno dela (data_inicio/data_fim)
+function filtroDatasVoos(data, datasFlexiveis, dias = DIAS_FLEXIVEIS) {
+  if (!datasFlexiveis) {
+    return { data };
+  }
+  if (!data || Number.isNaN(Date.parse(`${data}T00:00:00Z`))) {
+    return { data: '' };
+  }
+
+  const deslocar = (n) => {
+    const d = new Date(`${data}T00:00:00Z`);
+    d.setUTCDate(d.getUTCDate() + n);
+    return d.toISOString().slice(0, 10);
+  };
+  return { data: '', data_inicio: deslocar(-dias), data_fim: deslocar(dias) };
+}
+
 module.exports = {
   getFlightClient,
-  getHotelClient
+  getHotelClient,
+  getPackageClient,
+  filtroDatasVoos
 };
@@ -1,5 +1,5 @@
 const express = require('express');
-const { getFlightClient } = require('../grpc/clients');
+const { getFlightClient, filtroDatasVoos } = require('../grpc/clients');
 const router = express.Router();
 
 router.post('/search', async (req, res) => {
@@ -16,7 +16,9 @@ router.post('/search', async (req, res) => {
       classe,
       passageiros = 1,
       tipo_viagem = 'oneway',
-      datas_flexiveis = false
+      datas_flexiveis = false,
+      incluir_facetas = false,
+      campos
     } = req.body;
 
     const client = getFlightClient();
@@ -24,11 +26,14 @@ router.post('/search', async (req, res) => {
     const request = {
       origem,
       destino,
-      data: datas_flexiveis ? '' : data,
+      ...filtroDatasVoos(data, datas_flexiveis),
       preco_max: preco_max ? parseFloat(preco_max) : 0,
       companhia_aerea,
       faixa_horario,
-      ordenacao
+      ordenacao,
+      incluir_facetas: Boolean(incluir_facetas),
+      // Campos de cada voo (lista ou "id,preco,..."); ausente = todos
+      campos: campos ? { paths: Array.isArray(campos) ? campos : String(campos).split(',') } : undefined
     };
 
     client.ConsultarVoos(request, (error, response) => {
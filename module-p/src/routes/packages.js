@@ -1,7 +1,11 @@
 const express = require('express');
-const { getFlightClient, getHotelClient } = require('../grpc/clients');
+const { getPackageClient, filtroDatasVoos } = require('../grpc/clients');
 const router = express.Router();
 
+const LIMITE_PACOTES = 10;
+
+// Os pacotes são montados pelo PacotesService, que consulta voos e hotéis e
+// envia os mais baratos (voo + noites × diária) já em ordem de preço total
 router.post('/search', async (req, res) => {
   try {
     const {
@@ -9,91 +13,40 @@ router.post('/search', async (req, res) => {
       destino,
       data,
       data_volta,
-      rooms = 1,
-      guests = 1,
-      flight_class,
       min_rating,
       max_budget,
       datas_flexiveis = false
     } = req.body;
 
-    const flightClient = getFlightClient();
-    const hotelClient = getHotelClient();
-
-    const promises = [
-      new Promise((resolve, reject) => {
-        flightClient.ConsultarVoos({
-          origem: origem,
-          destino: destino,
-          data: datas_flexiveis ? '' : data,
-          ordenacao: 'preco'
-        }, (error, response) => {
-          if (error) reject(error);
-          else resolve(response);
+    const packageClient = getPackageClient();
+
+    const packages = await new Promise((resolve, reject) => {
+      const recebidos = [];
+      const call = packageClient.BuscarPacotes({
+        origem: origem,
+        destino: destino,
+        ...filtroDatasVoos(data, datas_flexiveis),
+        data_volta: data_volta,
+        min_estrelas: min_rating ? parseInt(min_rating) : undefined,
+        orcamento_max: max_budget ? parseFloat(max_budget) : undefined,
+        limite: LIMITE_PACOTES
+      });
+
+      call.on('data', (pacote) => {
+        const { checkin, checkout, noites } = pacote;
+        recebidos.push({
+          flight: { ...pacote.voo, data_volta: data_volta || checkout, checkin, checkout },
+          hotel: { ...pacote.hotel, checkin, checkout, nights: noites },
+          total_price: pacote.preco_total,
+          nights: noites
         });
-      }),
-      new Promise((resolve, reject) => {
-        hotelClient.SearchHotels({
-          city: destino,
-          min_stars: min_rating ? parseInt(min_rating) : undefined,
-          order_by: 'price'
-        }, (error, response) => {
-          if (error) reject(error);
-          else resolve(response);
-        });
-      })
-    ];
-
-    const [flightResults, hotelResults] = await Promise.all(promises);
-
-    const packages = [];
-    const flights = flightResults.voos || [];
-    const hotels = hotelResults.hotels || [];
-
-    const maxFlights = Math.min(flights.length, 5);
-    const maxHotels = Math.min(hotels.length, 5);
-
-    for (let i = 0; i < maxFlights; i++) {
-      for (let j = 0; j < maxHotels; j++) {
-        const flight = flights[i];
-        const hotel = hotels[j];
-
-        const checkin = data || flight.data; 
-        let checkout = data_volta;
-
-        if (!checkout && checkin) {
-          const checkinDate = new Date(checkin);
-          checkinDate.setDate(checkinDate.getDate() + 3);
-          checkout = checkinDate.toISOString().split('T')[0];
-        }
-
-        const nights = checkout && checkin ?
-          Math.ceil((new Date(checkout) - new Date(checkin)) / (1000 * 60 * 60 * 24)) : 1;
-
-        const totalPrice = flight.preco + (hotel.price * nights);
-
-        if (!max_budget || totalPrice <= max_budget) {
-          const flightWithDates = {
-            ...flight,
-            data_volta: data_volta || checkout,
-            checkin: checkin,
-            checkout: checkout
-          };
-
-          packages.push({
-            flight: flightWithDates,
-            hotel: { ...hotel, checkin, checkout, nights },
-            total_price: totalPrice,
-            nights: nights
-          });
-        }
-      }
-    }
-
-    packages.sort((a, b) => a.total_price - b.total_price);
+      });
+      call.on('end', () => resolve(recebidos));
+      call.on('error', reject);
+    });
 
     res.json({
-      packages: packages.slice(0, 10)
+      packages: packages
     });
 
   } catch (error) {
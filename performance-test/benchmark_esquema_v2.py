@@ -0,0 +1,94 @@
+"""
+Compara o Voo do esquema v1 (textos) com o do voos.v2 (enums e inteiros)
+
+Gera o inventário com a semente fixa e, para os mesmos voos, reporta por
+voo em cada esquema:
+- bytes da mensagem Voo serializada
+- encode: montar a mensagem a partir das colunas e serializar
+- decode: parse de uma ConsultaVoosResponse com todos os voos
+- leitura: acessar todos os campos de cada voo já decodificado
+
+Uso: python benchmark_esquema_v2.py [total_voos] [repeticoes]
+"""
+
+import sys
+import time
+from datetime import date
+
+sys.path.append('../module-a')
+sys.path.append('../module-a/proto')
+
+import voos_service_pb2
+import voos_service_v2_pb2
+from internal.gerador import gerar_inventario, SEMENTE_PADRAO
+from internal.inventario import InventarioVoos, enquadrar
+from internal.voos_v2 import SerializadorV2
+
+DATA_ANCORA = date(2025, 1, 1)
+TOTAL_VOOS_PADRAO = 100_000
+REPETICOES_PADRAO = 3
+
+
+def melhor_tempo(funcao, repeticoes):
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return min(tempos)
+
+
+def medir(montar_voo, tipo_resposta, linhas, repeticoes):
+    mensagens = [montar_voo(linha).SerializeToString() for linha in linhas]
+    resposta = b"".join(enquadrar(mensagem) for mensagem in mensagens)
+    campos = [campo.name for campo in tipo_resposta.DESCRIPTOR.fields_by_name["voos"].message_type.fields]
+
+    def encode():
+        for linha in linhas:
+            montar_voo(linha).SerializeToString()
+
+    def decode():
+        tipo_resposta.FromString(resposta)
+
+    voos = tipo_resposta.FromString(resposta).voos
+
+    def leitura():
+        for voo in voos:
+            for campo in campos:
+                getattr(voo, campo)
+
+    por_voo = 1e6 / len(linhas)
+    return {
+        "bytes": sum(len(mensagem) for mensagem in mensagens) / len(linhas),
+        "encode_us": melhor_tempo(encode, repeticoes) * por_voo,
+        "decode_us": melhor_tempo(decode, repeticoes) * por_voo,
+        "leitura_us": melhor_tempo(leitura, repeticoes) * por_voo,
+    }
+
+
+def main():
+    total_voos = int(sys.argv[1]) if len(sys.argv) > 1 else TOTAL_VOOS_PADRAO
+    repeticoes = int(sys.argv[2]) if len(sys.argv) > 2 else REPETICOES_PADRAO
+
+    inventario = InventarioVoos(*gerar_inventario(total_voos, SEMENTE_PADRAO, DATA_ANCORA))
+    linhas = range(len(inventario))
+    esquemas = {
+        "v1": medir(inventario.voo, voos_service_pb2.ConsultaVoosResponse, linhas, repeticoes),
+        "v2": medir(SerializadorV2(inventario).voo, voos_service_v2_pb2.ConsultaVoosResponse, linhas, repeticoes),
+    }
+
+    print(f"{total_voos:,} voos, melhor de {repeticoes} execuções")
+    print(f"{'esquema':>7} | {'bytes/voo':>9} | {'encode µs/voo':>13} | "
+          f"{'decode µs/voo':>13} | {'leitura µs/voo':>14}")
+    print("-" * 70)
+    for nome, r in esquemas.items():
+        print(f"{nome:>7} | {r['bytes']:>9.1f} | {r['encode_us']:>13.2f} | "
+              f"{r['decode_us']:>13.3f} | {r['leitura_us']:>14.2f}")
+
+    v1, v2 = esquemas["v1"], esquemas["v2"]
+    print(f"{'v2/v1':>7} | {v2['bytes'] / v1['bytes']:>9.2f} | {v2['encode_us'] / v1['encode_us']:>13.2f} | "
+          f"{v2['decode_us'] / v1['decode_us']:>13.2f} | {v2['leitura_us'] / v1['leitura_us']:>14.2f}")
+
+
+if __name__ == '__main__':
+    main()
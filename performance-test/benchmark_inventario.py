@@ -0,0 +1,75 @@
+"""
+Mede o custo de gerar e indexar o inventário de voos
+
+Para cada tamanho informado, gera o inventário com a semente fixa e
+reporta, normalizado por milhão de voos:
+- tempo de geração das colunas e tempo de construção do índice
+- memória das colunas e do índice
+- pico de memória alocada (tracemalloc)
+
+Uso: python benchmark_inventario.py [total_voos ...]
+"""
+
+import sys
+import time
+import tracemalloc
+from datetime import date
+
+sys.path.append('../module-a')
+sys.path.append('../module-a/proto')
+
+from internal.gerador import gerar_inventario, SEMENTE_PADRAO
+from internal.inventario import InventarioVoos
+
+DATA_ANCORA = date(2025, 1, 1)
+TAMANHOS_PADRAO = [100_000, 1_000_000, 5_000_000]
+
+
+def bytes_indice(inventario):
+    return sum(
+        ordenacao.linhas.nbytes + ordenacao.chaves.nbytes
+        for particao in inventario.indice.values()
+        for ordenacao in particao.values()
+    )
+
+
+def medir(total_voos):
+    tracemalloc.start()
+
+    inicio = time.perf_counter()
+    colunas, dicionarios, data_base = gerar_inventario(total_voos, SEMENTE_PADRAO, DATA_ANCORA)
+    tempo_geracao = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    inventario = InventarioVoos(colunas, dicionarios, data_base)
+    tempo_indice = time.perf_counter() - inicio
+
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "geracao_s": tempo_geracao,
+        "indice_s": tempo_indice,
+        "colunas_mb": sum(valores.nbytes for valores in colunas.values()) / 1024 ** 2,
+        "indice_mb": bytes_indice(inventario) / 1024 ** 2,
+        "pico_mb": pico / 1024 ** 2,
+    }
+
+
+def main():
+    tamanhos = [int(valor) for valor in sys.argv[1:]] or TAMANHOS_PADRAO
+
+    print(f"{'voos':>12} | {'geração s/M':>11} | {'índice s/M':>10} | "
+          f"{'colunas MB/M':>12} | {'índice MB/M':>11} | {'pico MB/M':>9}")
+    print("-" * 80)
+
+    for total_voos in tamanhos:
+        r = medir(total_voos)
+        por_milhao = 1_000_000 / total_voos
+        print(f"{total_voos:>12,} | {r['geracao_s'] * por_milhao:>11.3f} | "
+              f"{r['indice_s'] * por_milhao:>10.3f} | {r['colunas_mb'] * por_milhao:>12.1f} | "
+              f"{r['indice_mb'] * por_milhao:>11.1f} | {r['pico_mb'] * por_milhao:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""
+Compara a vazão de reservas de assentos com contenção alta e baixa
+
+Vários processos reservam 1 assento por vez sobre o mesmo inventário em
+memória compartilhada, com as mesmas travas usadas pelo servidor em modo
+multi-worker:
+- voo quente: todos os processos disputam um único voo
+- espalhado: cada reserva escolhe um voo aleatório do inventário
+
+Cada cenário roda com lock striping (LISTRAS_PADRAO travas) e com uma
+única trava global, para mostrar o ganho das listras. O ganho só aparece
+com pelo menos tantos núcleos quanto processos: com menos, os processos
+se revezam na CPU e quase nunca disputam a trava. Ao final confere que
+nenhum assento foi perdido ou reservado em dobro.
+
+Uso: python benchmark_reservas.py [processos] [segundos]
+"""
+
+import multiprocessing
+import os
+import random
+import sys
+import time
+from datetime import date
+
+import numpy as np
+
+sys.path.append('../module-a')
+sys.path.append('../module-a/proto')
+
+from internal.gerador import gerar_inventario, SEMENTE_PADRAO
+from internal.inventario import InventarioVoos, STATUS_VOO, STATUS_ATIVO
+from internal.memoria_compartilhada import SegmentoInventario
+from internal.reservas import ReservasAssentos, TravasVoos, LISTRAS_PADRAO
+
+TOTAL_VOOS = 10_000
+ASSENTOS_INICIAIS = 2 ** 30
+
+
+def trabalhador(nome_segmento, travas, quente, segundos, inicio, fila):
+    segmento = SegmentoInventario.anexar(nome_segmento)
+    inventario = InventarioVoos.de_segmento(segmento)
+    reservas = ReservasAssentos(inventario, travas)
+    ids = [f"V{linha + 1:04d}" for linha in range(len(inventario))]
+    sorteio = random.Random()
+
+    inicio.wait()
+    fim = time.perf_counter() + segundos
+    total = 0
+    while time.perf_counter() < fim:
+        voo_id = ids[0] if quente else sorteio.choice(ids)
+        sucesso, _ = reservas.reservar([(voo_id, 1)])
+        total += sucesso
+
+    fila.put(total)
+    del reservas, inventario
+    segmento.fechar()
+
+
+def executar(contexto, processos, segundos, quente, listras):
+    colunas, dicionarios, data_base = gerar_inventario(TOTAL_VOOS, SEMENTE_PADRAO, date(2025, 1, 1))
+    colunas["status_voo"][:] = STATUS_VOO.index(STATUS_ATIVO)
+    colunas["assentos_disponiveis"][:] = ASSENTOS_INICIAIS
+    segmento = SegmentoInventario.criar(colunas, dicionarios, data_base)
+
+    travas = TravasVoos(listras, fabrica=contexto.Lock)
+    inicio = contexto.Event()
+    fila = contexto.Queue()
+    filhos = [
+        contexto.Process(target=trabalhador, args=(segmento.nome, travas, quente, segundos, inicio, fila))
+        for _ in range(processos)
+    ]
+    for filho in filhos:
+        filho.start()
+
+    inicio.set()
+    reservadas = sum(fila.get() for _ in filhos)
+    for filho in filhos:
+        filho.join()
+
+    assentos = segmento.colunas["assentos_disponiveis"]
+    consistente = int(ASSENTOS_INICIAIS * len(assentos) - assentos.astype(np.int64).sum()) == reservadas
+    del assentos
+    segmento.fechar()
+    return reservadas / segundos, consistente
+
+
+def main():
+    processos = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    segundos = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    contexto = multiprocessing.get_context("spawn")
+
+    print(f"{processos} processos em {os.cpu_count()} núcleos, {segundos:.0f}s por cenário\n")
+    print(f"{'cenário':<12} | {'travas':>7} | {'reservas/s':>11} | {'consistente':>11}")
+    print("-" * 52)
+
+    for quente in (True, False):
+        for listras in (LISTRAS_PADRAO, 1):
+            vazao, consistente = executar(contexto, processos, segundos, quente, listras)
+            nome = "voo quente" if quente else "espalhado"
+            print(f"{nome:<12} | {listras:>7} | {vazao:>11,.0f} | {'sim' if consistente else 'NÃO':>11}")
+
+
+if __name__ == '__main__':
+    main()